@@ -0,0 +1,82 @@
+import asyncio
+import time
+from collections import deque
+from config import Config
+
+class AuditLogIndex:
+    """
+    Short-lived index of audit log entries received over the gateway
+    (on_audit_log_entry_create), keyed by (guild_id, action, target_id).
+    Listeners resolve the moderator and reason of an event from memory
+    instead of calling guild.audit_logs(); each entry is handed out once,
+    so a burst of bans is attributed entry by entry.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._waiters = {}
+        self._expiry = deque()
+
+    def add(self, entry):
+        target_id = getattr(entry.target, "id", None) or getattr(entry, "target_id", None)
+        if target_id is None:
+            return
+        key = (entry.guild.id, entry.action, target_id)
+
+        # Hand the entry straight to a listener that is already waiting for it
+        waiters = self._waiters.get(key)
+        while waiters:
+            future = waiters.popleft()
+            if not future.done():
+                future.set_result(entry)
+                return
+
+        now = time.monotonic()
+        self._entries.setdefault(key, deque()).append(entry)
+        self._expiry.append((now + Config.AUDIT_LOG_TTL_SECONDS, key, entry))
+        self._prune(now)
+
+    async def resolve(self, guild_id, action, target_id, wait=None):
+        """
+        Return the audit log entry for (action, target_id), waiting up to
+        `wait` seconds (AUDIT_LOG_WAIT_SECONDS by default) for it to arrive.
+        Returns None if no entry shows up.
+        """
+        key = (guild_id, action, target_id)
+        self._prune(time.monotonic())
+
+        entries = self._entries.get(key)
+        if entries:
+            entry = entries.popleft()
+            if not entries:
+                del self._entries[key]
+            return entry
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, deque()).append(future)
+        try:
+            return await asyncio.wait_for(future, Config.AUDIT_LOG_WAIT_SECONDS if wait is None else wait)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self._waiters.get(key)
+            if waiters is not None:
+                if future in waiters:
+                    waiters.remove(future)
+                if not waiters:
+                    del self._waiters[key]
+
+    def _prune(self, now):
+        while self._expiry and self._expiry[0][0] <= now:
+            _, key, entry = self._expiry.popleft()
+            entries = self._entries.get(key)
+            if not entries:
+                continue
+            try:
+                entries.remove(entry)
+            except ValueError:
+                pass  # Already handed out
+            if not entries:
+                del self._entries[key]
+
+audit_log_index = AuditLogIndex()
@@ -0,0 +1,168 @@
+import logging
+from collections import OrderedDict
+import regex
+from database import db, NotifyCache
+from config import Config
+
+# What apply_automod_rule does besides deleting the message; logged as automod_<punishment>
+PUNISHMENT_TYPES = frozenset({"delete", "warn", "timeout", "kick", "ban"})
+
+class AutomodRule:
+    def __init__(self, row):
+        self.id = row['id']
+        self.rule_type = row['rule_type']
+        self.pattern = row['pattern']
+        self.punishment_type = row['punishment_type']
+        if self.punishment_type not in PUNISHMENT_TYPES:
+            # Still enforced, as a plain delete, so a typo doesn't switch the rule off
+            logging.warning(f"Automod rule {self.id}: unknown punishment '{self.punishment_type}', only deleting")
+            self.punishment_type = "delete"
+        self.exempt_roles = frozenset(row['exempt_roles'] or ())
+        self.exempt_channels = frozenset(row['exempt_channels'] or ())
+
+    @property
+    def group(self):
+        return f"automod_rule_{self.id}"
+
+    def source(self):
+        if self.rule_type == "keyword":
+            return f"(?i:{regex.escape(self.pattern)})"
+        if self.rule_type == "regex":
+            return self.pattern
+        return None
+
+    def applies_to(self, channel_id, role_ids):
+        if channel_id in self.exempt_channels:
+            return False
+        return self.exempt_roles.isdisjoint(role_ids)
+
+class GuildRuleSet:
+    """
+    Enabled automod rules of one guild compiled into a single alternation.
+    Messages where some rules are exempt get a matcher for just the
+    applicable subset, cached by rule ids.
+
+    Each rule is wrapped in a named group in the alternation, which shifts
+    the numbering of any group of its own, so rules with capturing groups
+    (numbered backreferences would point at the wrong group) or global
+    inline flags (they would apply to every rule) are matched on their own.
+    """
+    SUBSET_CACHE_SIZE = 32
+    # Flags of a pattern with no inline flags, for spotting global ones
+    DEFAULT_FLAGS = regex.compile("").flags
+
+    def __init__(self, rules):
+        self.rules = {}
+        # rule id -> compiled pattern
+        self._patterns = {}
+        # Rules that can't be part of the alternation
+        self._standalone = set()
+        for rule in rules:
+            source = rule.source()
+            if source is None:
+                logging.warning(f"Automod rule {rule.id}: unknown rule type '{rule.rule_type}', skipped")
+                continue
+            try:
+                pattern = regex.compile(source)
+            except regex.error as e:
+                logging.warning(f"Automod rule {rule.id}: invalid pattern ({e}), skipped")
+                continue
+            self.rules[rule.id] = rule
+            self._patterns[rule.id] = pattern
+            if pattern.groups or pattern.flags != self.DEFAULT_FLAGS:
+                self._standalone.add(rule.id)
+        self._subsets = OrderedDict()
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def _matcher(self, rule_ids):
+        key = frozenset(rule_ids)
+        if key in self._subsets:
+            self._subsets.move_to_end(key)
+            return self._subsets[key]
+
+        rules = [self.rules[i] for i in sorted(key)]
+        try:
+            matcher = regex.compile("|".join(f"(?P<{r.group}>{r.source()})" for r in rules))
+        except regex.error as e:
+            logging.warning(f"Automod rules {sorted(key)} can't be combined ({e}), checking them one by one")
+            matcher = None
+        else:
+            # Every group must be one of the wrappers, or group lookups below report the wrong rule
+            if matcher.groups != len(rules):
+                logging.warning(f"Automod rules {sorted(key)} combined into {matcher.groups} groups, checking them one by one")
+                matcher = None
+        self._subsets[key] = matcher
+        if len(self._subsets) > self.SUBSET_CACHE_SIZE:
+            self._subsets.popitem(last=False)
+        return matcher
+
+    def quarantine(self, rule_id):
+        self.rules.pop(rule_id, None)
+        self._patterns.pop(rule_id, None)
+        self._standalone.discard(rule_id)
+        self._subsets.clear()
+
+    def match(self, content, channel_id, role_ids):
+        """Return the first applicable rule matching content, or None."""
+        rule_ids = [r.id for r in self.rules.values() if r.applies_to(channel_id, role_ids)]
+        if not rule_ids:
+            return None
+
+        budget = Config.AUTOMOD_REGEX_TIMEOUT_MS / 1000
+        combined = [i for i in rule_ids if i not in self._standalone]
+        separate = [i for i in rule_ids if i in self._standalone]
+        matcher = self._matcher(combined) if combined else None
+        if matcher is not None:
+            try:
+                found = matcher.search(content, timeout=budget)
+            except TimeoutError:
+                logging.warning("Automod combined pattern hit its time budget, checking rules one by one")
+                separate = rule_ids
+            else:
+                if found:
+                    for rule_id in combined:
+                        if found.group(self.rules[rule_id].group) is not None:
+                            return self.rules[rule_id]
+        else:
+            separate = rule_ids
+
+        # Slow path: evaluate rules separately so a pathological pattern
+        # only costs its own budget and can be taken out of rotation.
+        for rule_id in separate:
+            try:
+                if self._patterns[rule_id].search(content, timeout=budget):
+                    return self.rules[rule_id]
+            except TimeoutError:
+                logging.warning(f"Automod rule {rule_id} exceeded {Config.AUTOMOD_REGEX_TIMEOUT_MS}ms, disabled until rules reload")
+                self.quarantine(rule_id)
+        return None
+
+class AutomodEngine(NotifyCache):
+    """
+    Per-guild cache of compiled automod_rules, dropped when the
+    automod_rules trigger in migrations/0004 sends a NOTIFY for the guild.
+    """
+    CHANNEL = "automod_rules_changed"
+
+    def __init__(self):
+        self.query = db.query(
+            "automod_rules.enabled_by_guild",
+            "SELECT id, rule_type, pattern, punishment_type, exempt_roles, exempt_channels FROM automod_rules WHERE guild_id = $1 AND enabled ORDER BY id"
+        )
+        super().__init__(db)
+
+    async def load(self, guild_id):
+        rows = await db.fetch(self.query, guild_id)
+        return GuildRuleSet([AutomodRule(r) for r in rows])
+
+    async def check(self, message):
+        """Return the automod rule that message violates, or None."""
+        ruleset = await self.get(message.guild.id)
+        if not ruleset or not message.content:
+            return None
+        role_ids = {r.id for r in getattr(message.author, "roles", ())}
+        return ruleset.match(message.content, message.channel.id, role_ids)
+
+automod = AutomodEngine()
@@ -0,0 +1,275 @@
+"""
+Hot-path benchmarks for the cog event handlers.
+
+Runs the real Moderation, Logging and Tickets handlers against fake
+discord objects (benchmarks/fakes.py) and a local Postgres database,
+seeded to a realistic size, and reports throughput and p50/p99 latency
+per handler as JSON.
+
+    BENCH_DB_NAME=discordbot_bench python benchmarks/bench_handlers.py --output bench.json
+    python benchmarks/bench_handlers.py --compare bench.json
+
+The benchmark database is migrated automatically; only rows belonging to
+the benchmark guild are touched.
+"""
+import argparse
+import asyncio
+import datetime
+import functools
+import inspect
+import json
+import os
+import random
+import string
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+Config.DB_NAME = os.getenv("BENCH_DB_NAME", "discordbot_bench")
+
+from database import db
+from migrate import run_migrations
+from log_writer import log_writer
+from log_dispatcher import log_dispatcher
+from ticket_registry import ticket_registry
+from cogs.moderation import Moderation
+from cogs.logging import Logging
+from cogs.tickets import Tickets, TicketManagement
+from raid import NORMAL
+from benchmarks.fakes import FakeBot, FakeGuild, FakeMember, FakeMessage, FakeVoiceState, FakeInteraction
+
+BENCH_GUILD_ID = 1_000_000_000_000_001
+
+def random_word(length):
+    return "".join(random.choices(string.ascii_lowercase, k=length))
+
+async def seed(guild, filters, logs):
+    """Reset the benchmark guild's rows and load a realistic data set."""
+    log_channel = guild.channels[0]
+    async with db.transaction() as tx:
+        for table in ("word_filters", "server_logs", "punishments", "automod_rules"):
+            await tx.execute(f"DELETE FROM {table} WHERE guild_id = $1", guild.id)
+        await tx.execute("DELETE FROM ticket_members WHERE ticket_id IN (SELECT id FROM tickets WHERE guild_id = $1)", guild.id)
+        await tx.execute("DELETE FROM tickets WHERE guild_id = $1", guild.id)
+        await tx.execute(
+            """INSERT INTO guild_config (guild_id, log_channel_id, mod_log_channel_id, message_log_channel_id, member_log_channel_id, voice_log_channel_id)
+               VALUES ($1, $2, $2, $2, $2, $2)
+               ON CONFLICT (guild_id) DO UPDATE SET log_channel_id = $2, mod_log_channel_id = $2, message_log_channel_id = $2,
+                   member_log_channel_id = $2, voice_log_channel_id = $2""",
+            guild.id, log_channel.id
+        )
+
+    phrases = {random_word(random.randint(5, 12)) for _ in range(filters)}
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    actions = ("message_delete", "message_edit", "member_join", "member_leave", "voice_join", "voice_leave")
+    async with db.acquire() as connection:
+        await connection.copy_records_to_table(
+            "word_filters", records=[(guild.id, p) for p in phrases], columns=("guild_id", "phrase")
+        )
+        await connection.copy_records_to_table(
+            "server_logs",
+            records=[
+                (guild.id, random.choice(guild.members).id, random.choice(actions), None, f"Seeded row {i}", now - datetime.timedelta(seconds=i))
+                for i in range(logs)
+            ],
+            columns=("guild_id", "user_id", "action_type", "target_id", "details", "created_at")
+        )
+        await connection.copy_records_to_table(
+            "tickets",
+            records=[(guild.id, c.id, random.choice(guild.members).id, "closed") for c in guild.channels],
+            columns=("guild_id", "channel_id", "owner_id", "status")
+        )
+        await connection.execute("ANALYZE word_filters; ANALYZE server_logs; ANALYZE tickets;")
+    await ticket_registry.load()
+    return sorted(phrases)
+
+def build_handlers(bot, guild, phrases):
+    moderation = Moderation(bot)
+    logging_cog = Logging(bot)
+    tickets = Tickets(bot)
+    management = TicketManagement()
+    channel = guild.channels[1]
+    counter = iter(range(10**12))
+
+    def author():
+        return random.choice(guild.members)
+
+    def clean_message():
+        return FakeMessage(guild, channel, author(), f"just chatting about {random_word(8)} number {next(counter)}")
+
+    # Listeners hand their work to the guild scheduler; time the work itself
+    def work(listener):
+        return functools.partial(inspect.unwrap(listener), logging_cog)
+
+    async def on_message_clean():
+        await moderation.moderate_message(clean_message())
+
+    async def on_message_filtered():
+        content = f"this contains {random.choice(phrases)} {next(counter)}"
+        await moderation.moderate_message(FakeMessage(guild, channel, author(), content))
+
+    async def on_message_edit():
+        before = clean_message()
+        after = FakeMessage(guild, channel, before.author, before.content + " (edited)")
+        await work(Logging.on_message_edit)(before, after)
+
+    async def on_message_delete():
+        await work(Logging.on_message_delete)(clean_message())
+
+    async def on_voice_state_update():
+        voice = guild.channels[2]
+        await work(Logging.on_voice_state_update)(author(), FakeVoiceState(None), FakeVoiceState(voice))
+
+    async def on_member_join():
+        await logging_cog.log_member_join(FakeMember(guild, f"joiner-{next(counter)}"), NORMAL)
+
+    async def view_logs():
+        await logging_cog.view_logs.callback(logging_cog, FakeInteraction(guild, channel, author()), 25)
+
+    async def status_panel():
+        await tickets.status_panel.callback(tickets, FakeInteraction(guild, channel, author()))
+
+    async def reopen_ticket():
+        ticket_channel = random.choice(guild.channels)
+        await management.reopen_ticket.callback(FakeInteraction(guild, ticket_channel, author()))
+
+    return {
+        "moderation.on_message.clean": on_message_clean,
+        "moderation.on_message.filtered": on_message_filtered,
+        "logging.on_message_edit": on_message_edit,
+        "logging.on_message_delete": on_message_delete,
+        "logging.on_voice_state_update": on_voice_state_update,
+        "logging.on_member_join": on_member_join,
+        "logging.view_logs": view_logs,
+        "tickets.status_panel": status_panel,
+        "tickets.reopen": reopen_ticket,
+    }
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+async def measure(handler, iterations, concurrency, warmup):
+    for _ in range(warmup):
+        await handler()
+
+    latencies = []
+    remaining = iter(range(iterations))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            await handler()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "throughput_per_s": round(iterations / elapsed, 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 4),
+        "p50_ms": round(percentile(latencies, 0.50), 4),
+        "p99_ms": round(percentile(latencies, 0.99), 4),
+        "max_ms": round(latencies[-1], 4),
+    }
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path, threshold):
+    """Print per-handler deltas against a previous run. Returns True if anything regressed."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["handlers"]
+
+    regressed = False
+    print(f"\n{'handler':34} {'p50 Δ':>9} {'p99 Δ':>9} {'thru Δ':>9}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            print(f"{name:34} {'new':>9}")
+            continue
+        deltas = {
+            key: (current[key] - previous[key]) / previous[key] * 100 if previous[key] else 0.0
+            for key in ("p50_ms", "p99_ms", "throughput_per_s")
+        }
+        flag = deltas["p99_ms"] > threshold or deltas["throughput_per_s"] < -threshold
+        regressed = regressed or flag
+        print(f"{name:34} {deltas['p50_ms']:>+8.1f}% {deltas['p99_ms']:>+8.1f}% {deltas['throughput_per_s']:>+8.1f}%{'  REGRESSION' if flag else ''}")
+    return regressed
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--filters", type=int, default=5000, help="word filter phrases to seed")
+    parser.add_argument("--logs", type=int, default=100_000, help="server_logs rows to seed")
+    parser.add_argument("--members", type=int, default=5000, help="members in the fake guild")
+    parser.add_argument("--only", nargs="*", help="run only these handlers")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    # Keep the detectors on their normal path; each has its own benchmark scenario elsewhere
+    Config.RAID_JOIN_THRESHOLD = 10**9
+    Config.SPAM_MESSAGE_LIMIT = max(Config.SPAM_MESSAGE_LIMIT, 2 * args.iterations // args.members + 2)
+
+    await db.connect()
+    await run_migrations()
+    log_writer.start()
+
+    bot = FakeBot()
+    guild = FakeGuild(BENCH_GUILD_ID, members=args.members)
+    bot.guilds[guild.id] = guild
+    print(f"Seeding {args.filters} filters and {args.logs} log rows...", file=sys.stderr)
+    phrases = await seed(guild, args.filters, args.logs)
+
+    handlers = build_handlers(bot, guild, phrases)
+    results = {}
+    try:
+        for name, handler in handlers.items():
+            if args.only and name not in args.only:
+                continue
+            results[name] = await measure(handler, args.iterations, args.concurrency, args.warmup)
+            print(f"{name:34} {results[name]['throughput_per_s']:>10.1f}/s  p50 {results[name]['p50_ms']:.3f}ms  p99 {results[name]['p99_ms']:.3f}ms", file=sys.stderr)
+    finally:
+        await log_dispatcher.close()
+        await log_writer.close()
+        await db.close()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+            "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "handlers": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,144 @@
+"""
+Lightweight stand-ins for the discord.py objects the cog handlers touch.
+They implement only the attributes and coroutines the handlers use, and
+every REST-style call is a no-op, so benchmarks measure our code and the
+database rather than Discord.
+"""
+import datetime
+import itertools
+
+_ids = itertools.count(10_000_000)
+
+def snowflake():
+    return next(_ids)
+
+class FakeAsset:
+    url = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+class FakePermissions:
+    def __init__(self, **perms):
+        self.manage_messages = perms.get("manage_messages", False)
+        self.administrator = perms.get("administrator", False)
+
+class FakeRole:
+    def __init__(self, guild, name="role"):
+        self.id = snowflake()
+        self.guild = guild
+        self.name = name
+        self.mention = f"<@&{self.id}>"
+
+class FakeChannel:
+    def __init__(self, guild, name="general"):
+        self.id = snowflake()
+        self.guild = guild
+        self.name = name
+        self.mention = f"<#{self.id}>"
+        self.sent = 0
+
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+
+    async def set_permissions(self, *args, **kwargs):
+        pass
+
+class FakeMember:
+    def __init__(self, guild, name="user", bot=False, roles=(), age=datetime.timedelta(days=365), **perms):
+        self.id = snowflake()
+        self.guild = guild
+        self.name = name
+        self.bot = bot
+        self.roles = list(roles)
+        self.mention = f"<@{self.id}>"
+        self.display_name = name
+        self.display_avatar = FakeAsset()
+        self.created_at = datetime.datetime.now(datetime.timezone.utc) - age
+        self.guild_permissions = FakePermissions(**perms)
+        self.timed_out_until = None
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, *args, **kwargs):
+        pass
+
+    async def timeout(self, *args, **kwargs):
+        pass
+
+    async def kick(self, *args, **kwargs):
+        pass
+
+    async def ban(self, *args, **kwargs):
+        pass
+
+class FakeGuild:
+    def __init__(self, guild_id, name="Benchmark Guild", channels=5, members=100):
+        self.id = guild_id
+        self.name = name
+        self.channels = [FakeChannel(self, f"channel-{i}") for i in range(channels)]
+        self._channels = {c.id: c for c in self.channels}
+        self.members = [FakeMember(self, f"member-{i}") for i in range(members)]
+        self._members = {m.id: m for m in self.members}
+        self.default_role = FakeRole(self, "@everyone")
+        self.me = FakeMember(self, "bot", bot=True)
+
+    def get_channel(self, channel_id):
+        return self._channels.get(channel_id)
+
+    def get_member(self, member_id):
+        return self._members.get(member_id)
+
+    def get_role(self, role_id):
+        return None
+
+    async def fetch_channel(self, channel_id):
+        return self._channels[channel_id]
+
+class FakeMessage:
+    def __init__(self, guild, channel, author, content, mentions=()):
+        self.id = snowflake()
+        self.guild = guild
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.raw_mentions = list(mentions)
+        self.raw_role_mentions = []
+        self.mention_everyone = False
+        self.attachments = []
+        self.jump_url = f"https://discord.com/channels/{guild.id}/{channel.id}/{self.id}"
+
+    async def delete(self):
+        pass
+
+class FakeVoiceState:
+    def __init__(self, channel=None):
+        self.channel = channel
+
+class FakeResponse:
+    async def send_message(self, *args, **kwargs):
+        pass
+
+    async def defer(self, *args, **kwargs):
+        pass
+
+class FakeFollowup:
+    async def send(self, *args, **kwargs):
+        pass
+
+class FakeInteraction:
+    def __init__(self, guild, channel, user):
+        self.guild = guild
+        self.channel = channel
+        self.user = user
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+
+class FakeBot:
+    def __init__(self):
+        self.user = FakeMember(None, "bot", bot=True)
+        self.guilds = {}
+
+    def get_guild(self, guild_id):
+        return self.guilds.get(guild_id)
+
+    def get_user(self, user_id):
+        return None
@@ -0,0 +1,242 @@
+"""
+Replay a recorded gateway session into MyBot for load testing.
+
+Record production traffic by starting the bot with GATEWAY_RECORD_PATH
+(and optionally GATEWAY_RECORD_GUILD_IDS / GATEWAY_RECORD_SCRUB), then
+replay the file against a local Postgres and a stub Discord REST server:
+
+    python benchmarks/replay_gateway.py session.jsonl.gz --speed 10
+    python benchmarks/replay_gateway.py session.jsonl.gz --speed max --output replay.json
+
+Events go through discord.py's own parsers, so every cog listener runs
+exactly as it would in production. While replaying, event-loop lag,
+queue depths and DB pool wait times are reported every --interval seconds.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BOT_DIR)
+# bot.py loads cogs relative to its own directory
+os.chdir(BOT_DIR)
+
+from config import Config
+
+Config.DB_NAME = os.getenv("BENCH_DB_NAME", "discordbot_bench")
+Config.FORCE_COMMAND_SYNC = False
+Config.GATEWAY_RECORD_PATH = None
+
+import discord
+from database import db
+from log_writer import log_writer
+from log_dispatcher import log_dispatcher
+from metrics import loop_lag
+from scheduler import guild_scheduler
+from gateway_recorder import read_recording
+from benchmarks.rest_stub import StubRestServer
+
+def parse_speed(value):
+    if value == "max":
+        return None
+    speed = float(value.rstrip("x"))
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+class ReplayMonitor:
+    """Samples the bot's internals every interval while the replay runs."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.samples = []
+        self.events = 0
+        self.behind = 0.0
+        self._started = time.perf_counter()
+        self._last_events = 0
+        self._last_wait = (0, 0.0)
+        self._task = None
+
+    def start(self):
+        loop_lag.start()
+        loop_lag.reset()
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+        self.sample()
+        loop_lag.stop()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.sample()
+
+    def sample(self):
+        elapsed = time.perf_counter() - self._started
+        lag = loop_lag.reset()
+        wait = db.pool_wait
+        calls, total_ms = wait.calls - self._last_wait[0], wait.total_ms - self._last_wait[1]
+        self._last_wait = (wait.calls, wait.total_ms)
+        in_use, size = db.pool_usage()
+        sample = {
+            "elapsed_s": round(elapsed, 2),
+            "events": self.events,
+            "events_per_s": round((self.events - self._last_events) / self.interval, 1),
+            "behind_s": round(self.behind, 3),
+            "loop_lag_p99_ms": lag.percentile(0.99),
+            "loop_lag_max_ms": round(lag.max_ms, 2),
+            "tasks": len(asyncio.all_tasks()),
+            "scheduler_queue": guild_scheduler.pending,
+            "log_writer_queue": log_writer.pending,
+            "log_dispatcher_queue": log_dispatcher.pending,
+            "pool_in_use": in_use,
+            "pool_size": size,
+            "pool_wait_mean_ms": round(total_ms / calls, 3) if calls else 0.0,
+            "pool_wait_p99_ms": wait.percentile(0.99),
+        }
+        self._last_events = self.events
+        self.samples.append(sample)
+        print(
+            f"[{sample['elapsed_s']:>7.1f}s] {sample['events']:>8} events {sample['events_per_s']:>8.1f}/s"
+            f" behind {sample['behind_s']:.2f}s | loop lag p99 {sample['loop_lag_p99_ms']}ms max {sample['loop_lag_max_ms']}ms"
+            f" | tasks {sample['tasks']} | scheduler {sample['scheduler_queue']} | writer {sample['log_writer_queue']} dispatcher {sample['log_dispatcher_queue']}"
+            f" | pool {in_use}/{size} wait {sample['pool_wait_mean_ms']}ms",
+            file=sys.stderr
+        )
+
+async def replay(bot, events, speed, monitor):
+    state = bot._connection
+    # Guilds come from the recording; never ask the (stub) gateway to chunk them
+    state._chunk_guilds = False
+
+    counts = Counter()
+    errors = Counter()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    for t, event, data in events:
+        if speed is not None:
+            due = started + t / speed
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            monitor.behind = max(0.0, loop.time() - due)
+        else:
+            # Give listeners a turn between events, as the websocket reader does
+            await asyncio.sleep(0)
+
+        # Reconnects in the recording send READY again; the session is already set up
+        parser = state.parsers.get(event) if event != "READY" else None
+        if parser is None:
+            continue
+        try:
+            parser(data)
+        except Exception as e:
+            if not errors[event]:
+                logging.warning(f"Replaying {event} failed: {e!r}")
+            errors[event] += 1
+        counts[event] += 1
+        monitor.events += 1
+    return counts, errors
+
+async def drain(timeout):
+    """Wait for listener tasks, scheduled work, log batches and log channel queues to empty."""
+    deadline = time.perf_counter() + timeout
+    current = asyncio.current_task()
+    while time.perf_counter() < deadline:
+        busy = [t for t in asyncio.all_tasks() if t is not current and not t.done() and t.get_name().startswith("discord.py:")]
+        if not busy and not guild_scheduler.pending and not log_writer.pending and not log_dispatcher.pending:
+            return True
+        await asyncio.sleep(0.1)
+    return False
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", help="file written with GATEWAY_RECORD_PATH")
+    parser.add_argument("--speed", type=parse_speed, default=1.0, help="1, 10, ... or max (default 1)")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between progress reports")
+    parser.add_argument("--rest-latency-ms", type=float, default=0, help="artificial latency for every stub REST call")
+    parser.add_argument("--drain-timeout", type=float, default=60, help="seconds to wait for queues to empty after the last event")
+    parser.add_argument("--output", help="write the summary JSON here (default: stdout)")
+    args = parser.parse_args()
+
+    header, events = read_recording(args.recording)
+    events = iter(events)
+    first = next(events, None)
+    if first is None or first[1] != "READY":
+        raise SystemExit("Recording has no READY event; record from bot startup.")
+    ready = first[2]
+    application_id = int((ready.get("application") or {}).get("id") or ready["user"]["id"])
+
+    stub = StubRestServer(ready["user"], application_id, args.rest_latency_ms)
+    await stub.start()
+    discord.http.Route.BASE = stub.base_url
+
+    # Imported late so MyBot picks up the config overrides above
+    from bot import MyBot
+    bot = MyBot()
+    monitor = ReplayMonitor(args.interval)
+    wall_started = time.perf_counter()
+    try:
+        await bot.login("replay")
+        speed_label = "max" if args.speed is None else f"{args.speed:g}x"
+        print(f"Replaying {args.recording} at {speed_label} (scrubbed: {header.get('scrubbed')})", file=sys.stderr)
+        monitor.start()
+        counts, errors = await replay(bot, events, args.speed, monitor)
+        replayed_in = time.perf_counter() - wall_started
+        drained = await drain(args.drain_timeout)
+        monitor.stop()
+    finally:
+        await bot.close()
+        await stub.close()
+
+    slowest = sorted(db.stats.items(), key=lambda item: item[1].max_ms, reverse=True)[:10]
+    summary = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "recording": os.path.basename(args.recording),
+            "recorded_at": header.get("recorded_at"),
+            "speed": speed_label,
+            "rest_latency_ms": args.rest_latency_ms,
+            "profile": Config.BOT_PROFILE,
+        },
+        "events": dict(counts),
+        "errors": dict(errors),
+        "replay_seconds": round(replayed_in, 2),
+        "total_seconds": round(time.perf_counter() - wall_started, 2),
+        "drained": drained,
+        "peak": {
+            key: max((s[key] for s in monitor.samples), default=0)
+            for key in ("loop_lag_max_ms", "behind_s", "tasks", "scheduler_queue", "log_writer_queue", "log_dispatcher_queue", "pool_in_use")
+        },
+        "pool_wait": _stats_dict(db.pool_wait),
+        "slowest_queries": {name: _stats_dict(stats) for name, stats in slowest},
+        "guilds": guild_scheduler.stats(),
+        "rest_requests": dict(stub.requests.most_common()),
+        "log_messages_sent": log_dispatcher.messages_sent,
+        "log_embeds_sent": log_dispatcher.embeds_sent,
+        "samples": monitor.samples,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+    else:
+        print(json.dumps(summary, indent=2))
+
+def _stats_dict(stats):
+    return {
+        "calls": stats.calls,
+        "mean_ms": round(stats.total_ms / stats.calls, 3) if stats.calls else 0.0,
+        "p99_ms": stats.percentile(0.99),
+        "max_ms": round(stats.max_ms, 2),
+    }
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""
+Minimal stand-in for the Discord REST API, used by replay_gateway.py.
+
+Answers the handful of routes the bot calls with just enough JSON for
+discord.py to build its models, after an optional artificial latency.
+Every other write succeeds with 204 and unknown GETs return 404, which
+the bot already treats as "channel/member gone".
+"""
+import asyncio
+import datetime
+import re
+from collections import Counter
+from aiohttp import web
+
+# Collapse ids so request counts group by route rather than by object
+_ID = re.compile(r"/\d{5,}")
+
+class StubRestServer:
+    def __init__(self, user, application_id, latency_ms=0):
+        self.user = user
+        self.application_id = application_id
+        self.latency = latency_ms / 1000
+        self.requests = Counter()
+        self._snowflake = int(user["id"])
+        self._runner = None
+        self.port = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}/api/v10"
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_route("*", "/api/v10/{path:.*}", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def close(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def next_id(self):
+        self._snowflake += 1
+        return str(self._snowflake)
+
+    async def handle(self, request):
+        path = "/" + request.match_info["path"]
+        self.requests[f"{request.method} {_ID.sub('/{id}', path)}"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if path == "/users/@me":
+            return web.json_response(self.user)
+        if path == "/oauth2/applications/@me":
+            return web.json_response(self.application())
+        if request.method == "PUT" and path.endswith("/commands"):
+            return web.json_response([])
+        match = re.fullmatch(r"/channels/(\d+)/messages", path)
+        if match and request.method == "POST":
+            payload = await self.read_payload(request)
+            return web.json_response(self.message(match.group(1), payload))
+        if path.endswith("/audit-logs"):
+            return web.json_response({"audit_log_entries": [], "users": [], "webhooks": [], "integrations": [], "threads": [], "application_commands": [], "auto_moderation_rules": [], "guild_scheduled_events": []})
+        if request.method == "GET":
+            return web.json_response({"message": "Unknown", "code": 10003}, status=404)
+        return web.Response(status=204)
+
+    async def read_payload(self, request):
+        if request.content_type == "application/json":
+            return await request.json()
+        # Multipart (files); the JSON part is named payload_json
+        reader = await request.multipart()
+        async for part in reader:
+            if part.name == "payload_json":
+                return await part.json()
+        return {}
+
+    def application(self):
+        return {
+            "id": str(self.application_id),
+            "name": self.user["username"],
+            "icon": None,
+            "description": "",
+            "rpc_origins": [],
+            "bot_public": False,
+            "bot_require_code_grant": False,
+            "verify_key": "0" * 64,
+            "flags": 0,
+            "owner": self.user,
+        }
+
+    def message(self, channel_id, payload):
+        return {
+            "id": self.next_id(),
+            "channel_id": channel_id,
+            "type": 0,
+            "content": payload.get("content") or "",
+            "author": self.user,
+            "embeds": payload.get("embeds") or [],
+            "attachments": [],
+            "components": [],
+            "mentions": [],
+            "mention_roles": [],
+            "mention_everyone": False,
+            "pinned": False,
+            "tts": False,
+            "flags": 0,
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "edited_timestamp": None,
+        }
@@ -1,46 +1,160 @@
-import discord
+from discord import app_commands
 from discord.ext import commands
+import asyncio
+import contextlib
+import hashlib
+import json
 import os
 import logging
+import time
 from config import Config
 from database import db
+from migrate import run_migrations
+from log_writer import log_writer
+from ticket_registry import ticket_registry
+from ticket_capture import ticket_messages
+from transcripts import transcript_store
+from log_dispatcher import log_dispatcher
+from log_retention import server_log_maintenance
+from profiles import build_profile, check_cog_requirements
+from gateway_recorder import gateway_recorder
+from metrics import instrumentation, loop_lag, metrics_server
+from scheduler import guild_scheduler, guild_id_of
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO)
 
+PROCESS_STARTED = time.perf_counter()
+
+class InstrumentedTree(app_commands.CommandTree):
+    """Command tree that times every app command invocation."""
+
+    async def _call(self, interaction):
+        started = time.perf_counter()
+        try:
+            await super()._call(interaction)
+        finally:
+            command = interaction.command
+            name = command.qualified_name if command else (interaction.data or {}).get("name", "unknown")
+            cog = command.binding.qualified_name if command and isinstance(command.binding, commands.Cog) else "-"
+            instrumentation.record("command", cog, name, interaction.guild_id, (time.perf_counter() - started) * 1000)
+
 class MyBot(commands.Bot):
     def __init__(self):
+        self.profile = build_profile(Config.BOT_PROFILE)
         super().__init__(
             command_prefix="!",
-            intents=discord.Intents.all(),
-            help_command=None
+            help_command=None,
+            tree_cls=InstrumentedTree,
+            # Raw gateway payloads are only dispatched with debug events on
+            enable_debug_events=bool(Config.GATEWAY_RECORD_PATH),
+            **self.profile
         )
+        self.startup_timings = {}
+
+    @contextlib.contextmanager
+    def startup_phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.startup_timings[name] = time.perf_counter() - started
 
     async def setup_hook(self):
         # Connect to Database
-        await db.connect()
+        with self.startup_phase("db_connect"):
+            await db.connect()
         
-        # Initialize Schema (Simple way for now, better to use migrations in production)
-        with open('schema.sql', 'r') as f:
-            schema = f.read()
-            # Split commands by semicolon to execute one by one if needed, 
-            # or execute block if supported. asyncpg execute supports multiple statements usually.
-            await db.execute(schema)
+        # Apply pending schema migrations (no-op when already current)
+        with self.startup_phase("schema"):
+            await run_migrations()
+
+        # Start buffered server_logs writer
+        log_writer.start()
+        # Index ticket channels and start capturing their messages (before the gateway connects, so none are missed)
+        await ticket_registry.load()
+        ticket_messages.start()
+        await ticket_messages.load()
+        # Move transcripts still stored in the tickets table to TRANSCRIPT_PATH
+        transcript_store.start()
+        # Create upcoming server_logs partitions and apply retention, now and periodically
+        server_log_maintenance.start()
+
+        guild_scheduler.start()
+        loop_lag.start()
+        if Config.METRICS_HTTP_PORT:
+            await metrics_server.start(Config.METRICS_HTTP_HOST, Config.METRICS_HTTP_PORT)
+
+        if Config.GATEWAY_RECORD_PATH:
+            gateway_recorder.start(Config.GATEWAY_RECORD_PATH, Config.GATEWAY_RECORD_GUILD_IDS, Config.GATEWAY_RECORD_SCRUB)
             
-        # Load Cogs
-        for filename in os.listdir('./cogs'):
-            if filename.endswith('.py'):
-                await self.load_extension(f'cogs.{filename[:-3]}')
-                logging.info(f'Loaded Cog: {filename}')
+        # Load Cogs (independent of each other, so load them together)
+        with self.startup_phase("cogs"):
+            filenames = sorted(f for f in os.listdir('./cogs') if f.endswith('.py'))
+            await asyncio.gather(*(self.load_extension(f'cogs.{f[:-3]}') for f in filenames))
+            logging.info(f"Loaded Cogs: {', '.join(filenames)}")
+        check_cog_requirements(self)
         
-        # Sync Commands
+        # Sync Commands, only when the command tree changed since the last sync
+        with self.startup_phase("sync"):
+            await self.sync_commands()
+
+    def command_tree_hash(self):
+        payload = []
+        for command in self.tree.get_commands():
+            try:
+                payload.append(command.to_dict(self.tree))
+            except TypeError:
+                # discord.py < 2.4 takes no tree argument
+                payload.append(command.to_dict())
+        payload.sort(key=lambda c: (c.get('type', 1), c['name']))
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    async def sync_commands(self):
+        key = f"command_tree_hash:{self.application_id}"
+        tree_hash = self.command_tree_hash()
+        stored = await db.fetchval("SELECT value FROM bot_state WHERE key = $1", key)
+        if stored == tree_hash and not Config.FORCE_COMMAND_SYNC:
+            logging.info("Command tree unchanged, skipping sync.")
+            return
+
         await self.tree.sync()
+        await db.execute(
+            "INSERT INTO bot_state (key, value) VALUES ($1, $2) ON CONFLICT (key) DO UPDATE SET value = $2, updated_at = CURRENT_TIMESTAMP",
+            key, tree_hash
+        )
         logging.info("Commands synced.")
 
     async def on_ready(self):
         logging.info(f'Logged in as {self.user} (ID: {self.user.id})')
+        if "ready" not in self.startup_timings:
+            self.startup_timings["ready"] = time.perf_counter() - PROCESS_STARTED
+            report = " | ".join(f"{name}: {seconds:.2f}s" for name, seconds in self.startup_timings.items())
+            logging.info(f"Startup timings: {report}")
+
+    async def _run_event(self, coro, event_name, *args, **kwargs):
+        # Every listener (cog or bot) is scheduled through here, so time them all
+        started = time.perf_counter()
+        try:
+            await super()._run_event(coro, event_name, *args, **kwargs)
+        finally:
+            owner = getattr(coro, "__self__", None)
+            cog = owner.qualified_name if isinstance(owner, commands.Cog) else type(owner).__name__
+            instrumentation.record("event", cog, event_name, guild_id_of(args), (time.perf_counter() - started) * 1000)
+
+    async def on_socket_raw_receive(self, msg):
+        gateway_recorder.record(msg)
 
     async def close(self):
+        gateway_recorder.close()
+        loop_lag.stop()
+        await metrics_server.close()
+        await guild_scheduler.close()
+        server_log_maintenance.stop()
+        transcript_store.stop()
+        await log_dispatcher.close()
+        await log_writer.close()
+        await ticket_messages.close()
         await db.close()
         await super().close()
 
@@ -0,0 +1,69 @@
+import logging
+import time
+from collections import Counter
+import discord
+from config import Config
+
+class ChannelResolver:
+    """
+    Resolves configured channel ids (log channels, ticket categories).
+    Channels found via fetch_channel are kept, and ids that fail to resolve
+    are negatively cached for CHANNEL_NEGATIVE_TTL_SECONDS so a deleted log
+    channel doesn't cost a REST call per event. on_guild_channel_create and
+    on_guild_channel_delete should call invalidate().
+    """
+
+    def __init__(self):
+        self._found = {}
+        self._missing = {}
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        # guild_id -> number of lookups answered from the negative cache
+        self.missing_by_guild = Counter()
+
+    async def resolve(self, guild, channel_id):
+        if not channel_id:
+            return None
+
+        channel = guild.get_channel(channel_id) or self._found.get(channel_id)
+        if channel:
+            self.hits += 1
+            return channel
+
+        now = time.monotonic()
+        expires = self._missing.get(channel_id)
+        if expires is not None:
+            if expires > now:
+                self.misses += 1
+                self.missing_by_guild[guild.id] += 1
+                return None
+            del self._missing[channel_id]
+
+        self.fetches += 1
+        try:
+            channel = await guild.fetch_channel(channel_id)
+        except (discord.NotFound, discord.Forbidden, discord.InvalidData) as e:
+            if channel_id not in self._missing:
+                logging.warning(f"Configured channel {channel_id} in guild {guild.id} is unavailable: {e}")
+            self._missing[channel_id] = now + Config.CHANNEL_NEGATIVE_TTL_SECONDS
+            self.misses += 1
+            self.missing_by_guild[guild.id] += 1
+            return None
+        except discord.HTTPException as e:
+            # Transient failure, don't cache it either way
+            logging.warning(f"Fetching channel {channel_id} in guild {guild.id} failed: {e}")
+            return None
+
+        self._found[channel_id] = channel
+        return channel
+
+    def invalidate(self, channel_id):
+        self._found.pop(channel_id, None)
+        self._missing.pop(channel_id, None)
+
+    def is_missing(self, channel_id):
+        expires = self._missing.get(channel_id)
+        return expires is not None and expires > time.monotonic()
+
+channel_resolver = ChannelResolver()
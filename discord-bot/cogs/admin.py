@@ -3,6 +3,15 @@ from discord import app_commands
 from discord.ext import commands
 from database import db
 from config import Config
+from channels import channel_resolver
+
+def describe_retention(days):
+    if days is None:
+        days = Config.LOG_RETENTION_DAYS
+        suffix = " (bot default)"
+    else:
+        suffix = ""
+    return ("forever" if days == 0 else f"{days} days") + suffix
 
 class Admin(commands.Cog):
     def __init__(self, bot):
@@ -37,6 +46,7 @@ class Admin(commands.Cog):
             f"INSERT INTO guild_config (guild_id, {column}) VALUES ($1, $2) ON CONFLICT (guild_id) DO UPDATE SET {column} = $2",
             interaction.guild.id, channel.id
         )
+        db.guild_configs.invalidate(interaction.guild.id)
         embed = discord.Embed(description=f"Log channel for **{type}** set to {channel.mention}", color=Config.COLOR_SUCCESS)
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -53,10 +63,22 @@ class Admin(commands.Cog):
             f"INSERT INTO guild_config (guild_id, {facility}) VALUES ($1, $2) ON CONFLICT (guild_id) DO UPDATE SET {facility} = $2",
             interaction.guild.id, enabled
         )
+        db.guild_configs.invalidate(interaction.guild.id)
         status = "enabled" if enabled else "disabled"
         embed = discord.Embed(description=f"Facility **{facility.replace('log_', '').replace('_', ' ')}** is now **{status}**", color=Config.COLOR_SUCCESS)
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    @logging_group.command(name="retention", description="How long to keep this server's logs")
+    @app_commands.describe(days="Days to keep logs (0 keeps them forever); leave empty to use the bot default")
+    async def set_log_retention(self, interaction: discord.Interaction, days: app_commands.Range[int, 0, 3650] = None):
+        await db.execute(
+            "INSERT INTO guild_config (guild_id, log_retention_days) VALUES ($1, $2) ON CONFLICT (guild_id) DO UPDATE SET log_retention_days = $2",
+            interaction.guild.id, days
+        )
+        db.guild_configs.invalidate(interaction.guild.id)
+        embed = discord.Embed(description=f"Log retention set to **{describe_retention(days)}**", color=Config.COLOR_SUCCESS)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
     @admin_group.command(name="set_transcripts", description="Set the transcript log channel")
     async def set_transcripts(self, interaction: discord.Interaction, channel: discord.TextChannel):
         await db.execute(
@@ -64,6 +86,7 @@ class Admin(commands.Cog):
                ON CONFLICT (guild_id) DO UPDATE SET transcript_channel_id = $2""",
             interaction.guild.id, channel.id
         )
+        db.guild_configs.invalidate(interaction.guild.id)
         embed = discord.Embed(description=f"Transcript channel set to {channel.mention}", color=Config.COLOR_SUCCESS)
         await interaction.response.send_message(embed=embed, ephemeral=True)
     
@@ -73,6 +96,7 @@ class Admin(commands.Cog):
             "INSERT INTO guild_config (guild_id) VALUES ($1) ON CONFLICT DO NOTHING",
             interaction.guild.id
         )
+        db.guild_configs.invalidate(interaction.guild.id)
         embed = discord.Embed(description="Guild configuration initialized.", color=Config.COLOR_SUCCESS)
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -85,7 +109,7 @@ class Admin(commands.Cog):
 
     @admin_group.command(name="info", description="View current bot configuration for this guild")
     async def config_info(self, interaction: discord.Interaction):
-        config = await db.fetchrow("SELECT * FROM guild_config WHERE guild_id = $1", interaction.guild.id)
+        config = await db.get_guild_config(interaction.guild.id)
         if not config:
             embed = discord.Embed(description="Guild not initialized. Use `/config init`.", color=Config.COLOR_ERROR)
             return await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -109,6 +133,14 @@ class Admin(commands.Cog):
         toggles.append(f"Voice Updates: {'Enabled' if config['log_voice_updates'] else 'Disabled'}")
         
         embed.add_field(name="Logging Facilities", value="\n".join(toggles), inline=False)
+        embed.add_field(name="Log Retention", value=describe_retention(config['log_retention_days']), inline=False)
+
+        # Configured channels that can't be resolved (deleted or no access)
+        channel_columns = ['log_channel_id', 'mod_log_channel_id', 'message_log_channel_id', 'member_log_channel_id', 'voice_log_channel_id', 'transcript_channel_id', 'ticket_category_id']
+        missing = [f"`{config[c]}` ({c})" for c in channel_columns if config[c] and channel_resolver.is_missing(config[c])]
+        if missing:
+            skipped = channel_resolver.missing_by_guild[interaction.guild.id]
+            embed.add_field(name="Unreachable Channels", value="\n".join(missing) + f"\nSkipped deliveries: `{skipped}`", inline=False)
         
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
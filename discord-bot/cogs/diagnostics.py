@@ -0,0 +1,116 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+from metrics import instrumentation, snapshot
+from scheduler import guild_scheduler
+from config import Config
+import datetime
+
+async def is_bot_owner(interaction: discord.Interaction):
+    return await interaction.client.is_owner(interaction.user)
+
+class Diagnostics(commands.Cog):
+    """
+    Runtime health of the bot (owner only).
+    """
+    def __init__(self, bot):
+        self.bot = bot
+
+    diagnostics_group = app_commands.Group(
+        name="diagnostics",
+        description="Bot runtime metrics (owner only)",
+        default_permissions=discord.Permissions(administrator=True)
+    )
+
+    @diagnostics_group.command(name="overview", description="Event loop lag, queues, DB pool and slowest callbacks")
+    @app_commands.check(is_bot_owner)
+    @app_commands.describe(sort="Rank callbacks by p99, max or total time")
+    @app_commands.choices(sort=[
+        app_commands.Choice(name="p99 latency", value="p99"),
+        app_commands.Choice(name="Max latency", value="max"),
+        app_commands.Choice(name="Total time", value="total")
+    ])
+    async def overview(self, interaction: discord.Interaction, sort: str = "p99"):
+        data = snapshot()
+        lag = data["loop_lag"]
+        pool = data["pool"]
+
+        embed = discord.Embed(title="Diagnostics", color=Config.COLOR_NEUTRAL, timestamp=datetime.datetime.now())
+        embed.add_field(name="Loop Lag (1 min)", value=f"p50 `{lag['p50_ms']}ms`\np99 `{lag['p99_ms']}ms`\nmax `{lag['max_ms']}ms`", inline=True)
+        embed.add_field(
+            name="DB Pool",
+            value=f"In use `{pool['in_use']}/{pool['size']}`\nWait p99 `{pool['wait']['p99_ms']}ms`\nWait max `{pool['wait']['max_ms']}ms`",
+            inline=True
+        )
+        embed.add_field(
+            name="Queues",
+            value=f"Log writer `{data['queues']['log_writer']}`\nLog channels `{data['queues']['log_dispatcher']}`\nTasks `{data['tasks']}`",
+            inline=True
+        )
+
+        lines = [
+            f"`{stats.percentile(0.99):>6.0f}ms p99` `{stats.max_ms:>6.0f}ms max` `{stats.calls:>7}` {cog}.{name}"
+            for kind, cog, name, stats in instrumentation.top(limit=10, by=sort)
+        ]
+        embed.add_field(name=f"Slowest Callbacks (by {sort})", value="\n".join(lines) or "No data yet.", inline=False)
+
+        if data["counters"]:
+            counters = sorted(data["counters"].items(), key=lambda item: item[1], reverse=True)[:10]
+            embed.add_field(name="Counters", value="\n".join(f"{name}: `{value}`" for name, value in counters), inline=False)
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @diagnostics_group.command(name="slow", description="Recent callbacks slower than the threshold")
+    @app_commands.check(is_bot_owner)
+    async def slow(self, interaction: discord.Interaction):
+        entries = list(instrumentation.slow)[-8:]
+        embed = discord.Embed(
+            title="Slow Callbacks",
+            description=f"Threshold: `{Config.SLOW_CALLBACK_MS:.0f}ms`",
+            color=Config.COLOR_NEUTRAL
+        )
+        if not entries:
+            embed.add_field(name="None", value="No slow callbacks recorded.", inline=False)
+        else:
+            lines = [
+                f"<t:{int(e['at'])}:R> `{e['ms']:.0f}ms` {e['cog']}.{e['name']} (guild `{e['guild_id']}`)"
+                for e in reversed(entries)
+            ]
+            embed.add_field(name="Most Recent", value="\n".join(lines), inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @diagnostics_group.command(name="guilds", description="Per-guild work queues and throttling")
+    @app_commands.check(is_bot_owner)
+    async def guilds(self, interaction: discord.Interaction):
+        stats = guild_scheduler.stats()
+        rows = stats[:10]
+        embed = discord.Embed(
+            title="Guild Scheduler",
+            description=(
+                f"Running `{sum(r['running'] for r in stats)}`/`{Config.SCHEDULER_CONCURRENCY}` - "
+                f"per guild cap `{Config.SCHEDULER_GUILD_CONCURRENCY}`, queue limit `{Config.SCHEDULER_GUILD_QUEUE_MAX}`"
+            ),
+            color=Config.COLOR_NEUTRAL
+        )
+        for row in rows:
+            guild = self.bot.get_guild(row["guild_id"])
+            embed.add_field(
+                name=f"{guild.name if guild else row['guild_id']} (weight {row['weight']})",
+                value=(
+                    f"Queued `{row['queued']}` (peak `{row['max_depth']}`) Running `{row['running']}`\n"
+                    f"Dropped `{row['dropped']}` Throttled `{row['throttled']}`\n"
+                    f"Wait p99 `{row['wait_p99_ms']}ms` max `{row['wait_max_ms']}ms`"
+                ),
+                inline=False
+            )
+        if not rows:
+            embed.add_field(name="Idle", value="No guild work scheduled yet.", inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    async def cog_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(error, app_commands.CheckFailure):
+            embed = discord.Embed(description="This command is restricted to the bot owner.", color=Config.COLOR_ERROR)
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+
+async def setup(bot):
+    await bot.add_cog(Diagnostics(bot))
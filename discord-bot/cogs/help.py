@@ -11,6 +11,7 @@ COG_LABELS = {
     "Admin": "Admin",
     "Logging": "Logging",
     "Snippets": "Snippets",
+    "Diagnostics": "Diagnostics",
     "Help": "Help"
 }
 
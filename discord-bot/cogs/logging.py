@@ -1,27 +1,186 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from database import db
+from log_writer import log_writer
+from log_dispatcher import log_dispatcher
+from audit_log import audit_log_index
+from channels import channel_resolver
+from raid import raid_detector, NORMAL, RAID_STARTED
+from metrics import instrumentation
+from scheduler import guild_scheduler, scheduled
 from config import Config
+import asyncio
 import datetime
+import logging
+import re
+
+# Action types written to server_logs, offered as /logs filter choices
+LOG_ACTIONS = [
+    "message_delete", "message_edit", "member_join", "member_leave",
+    "voice_join", "voice_leave", "voice_move", "kick", "ban", "unban",
+    "timeout", "remove_timeout", "purge", "raid_timeout", "raid_kick"
+]
+
+def parse_when(value):
+    """
+    '30m', '12h', '7d' or '2w' ago, or an ISO date/time (UTC unless it has
+    an offset). Returns a naive UTC datetime to compare with created_at.
+    """
+    value = value.strip().lower()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    match = re.fullmatch(r"(\d+)\s*([mhdw])", value)
+    if match:
+        unit = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}[match.group(2)]
+        moment = now - datetime.timedelta(**{unit: int(match.group(1))})
+    else:
+        moment = datetime.datetime.fromisoformat(value.upper())
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return moment.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+class LogBrowser(discord.ui.View):
+    """
+    Pages through server_logs newest first. Each page is fetched when it's
+    shown, by keyset on (created_at, id) from the edge of the current page,
+    so any page costs the same as the first however many rows there are.
+    """
+    COLUMNS = "id, created_at, user_id, action_type, target_id, details"
+
+    def __init__(self, author, guild_id, page_size, action=None, user_id=None, since=None, until=None):
+        super().__init__(timeout=300)
+        self.author = author
+        self.guild_id = guild_id
+        self.page_size = page_size
+        self.action = action
+        self.user_id = user_id
+        self.since = since
+        self.until = until
+        self.page = 1
+        self.rows = []
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author.id:
+            embed = discord.Embed(description="This log browser is for the command author only.", color=Config.COLOR_ERROR)
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return False
+        return True
+
+    async def fetch(self, older_than=None, newer_than=None):
+        """Fetch one page past the given row (or the newest page). Returns (rows, more beyond them)."""
+        conditions, args = ["guild_id = $1"], [self.guild_id]
+        def param(value):
+            args.append(value)
+            return f"${len(args)}"
+
+        if self.action:
+            conditions.append(f"action_type = {param(self.action)}")
+        if self.user_id:
+            conditions.append(f"user_id = {param(self.user_id)}")
+        if self.since:
+            conditions.append(f"created_at >= {param(self.since)}")
+        if self.until:
+            conditions.append(f"created_at < {param(self.until)}")
+
+        order = "DESC"
+        if older_than:
+            conditions.append(f"(created_at, id) < ({param(older_than['created_at'])}, {param(older_than['id'])})")
+        elif newer_than:
+            conditions.append(f"(created_at, id) > ({param(newer_than['created_at'])}, {param(newer_than['id'])})")
+            order = "ASC"
+
+        rows = await db.fetch(
+            f"SELECT {self.COLUMNS} FROM server_logs WHERE {' AND '.join(conditions)} "
+            f"ORDER BY created_at {order}, id {order} LIMIT {param(self.page_size + 1)}",
+            *args
+        )
+        more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if order == "ASC":
+            rows.reverse()
+        return rows, more
+
+    async def load_first(self):
+        self.rows, has_next = await self.fetch()
+        self.page = 1
+        self.update_buttons(has_prev=False, has_next=has_next)
+
+    def update_buttons(self, has_prev, has_next):
+        self.previous_page.disabled = not has_prev
+        self.next_page.disabled = not has_next
+
+    def get_embed(self):
+        filters = []
+        if self.action:
+            filters.append(f"action `{self.action}`")
+        if self.user_id:
+            filters.append(f"user <@{self.user_id}>")
+        if self.since:
+            filters.append(f"since {discord.utils.format_dt(self.since.replace(tzinfo=datetime.timezone.utc), 'f')}")
+        if self.until:
+            filters.append(f"until {discord.utils.format_dt(self.until.replace(tzinfo=datetime.timezone.utc), 'f')}")
+
+        if not self.rows:
+            return discord.Embed(description="No logs found" + (f" for {', '.join(filters)}." if filters else "."), color=Config.COLOR_ERROR)
+
+        lines = []
+        for log in self.rows:
+            when = discord.utils.format_dt(log['created_at'].replace(tzinfo=datetime.timezone.utc), "f")
+            # Mentions are resolved by the client, no user lookups needed here
+            who = f"<@{log['user_id']}>" if log['user_id'] else "-"
+            details = (log['details'] or "")[:120]
+            lines.append(f"{when} **{log['action_type']}** {who} {details}")
+
+        embed = discord.Embed(title="Server Logs", description="\n".join(lines)[:4000], color=Config.COLOR_NEUTRAL)
+        if filters:
+            embed.add_field(name="Filters", value=", ".join(filters), inline=False)
+        embed.set_footer(text=f"Page {self.page}")
+        return embed
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        rows, has_prev = await self.fetch(newer_than=self.rows[0])
+        if rows:
+            self.rows = rows
+            self.page = max(1, self.page - 1)
+            self.update_buttons(has_prev=has_prev, has_next=True)
+        else:
+            # Everything newer was removed since the page was shown
+            await self.load_first()
+        await interaction.response.edit_message(embed=self.get_embed(), view=self)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        rows, has_next = await self.fetch(older_than=self.rows[-1])
+        if rows:
+            self.rows = rows
+            self.page += 1
+        self.update_buttons(has_prev=True, has_next=has_next and bool(rows))
+        await interaction.response.edit_message(embed=self.get_embed(), view=self)
 
 class Logging(commands.Cog):
+    # Joins/leaves/timeouts, bans and audit log entries, voice, edit/delete content
+    REQUIRED_INTENTS = ("members", "moderation", "voice_states", "guild_messages", "message_content")
+    REQUIRES_MESSAGE_CACHE = True
+
     def __init__(self, bot):
         self.bot = bot
+        self.raid_action_limit = asyncio.Semaphore(Config.RAID_ACTION_CONCURRENCY)
+
+    async def cog_load(self):
+        self.raid_summaries.change_interval(seconds=Config.RAID_SUMMARY_SECONDS)
+        self.raid_summaries.start()
+
+    async def cog_unload(self):
+        self.raid_summaries.cancel()
 
     async def log_to_db(self, guild_id, user_id, action_type, target_id=None, details=None):
-        try:
-            await db.execute(
-                "INSERT INTO server_logs (guild_id, user_id, action_type, target_id, details) VALUES ($1, $2, $3, $4, $5)",
-                guild_id, user_id, action_type, target_id, details
-            )
-        except Exception as e:
-            print(f"Failed to log to DB: {e}")
+        await log_writer.add(guild_id, user_id, action_type, target_id, details)
 
     async def send_log_channel(self, guild, embed, log_type="general"):
         try:
-            config = await db.fetchrow("SELECT * FROM guild_config WHERE guild_id = $1", guild.id)
+            config = await db.get_guild_config(guild.id)
             if not config:
-                print(f"DEBUG: No config found for guild {guild.id}")
+                instrumentation.count("log_channel.no_config")
                 return
 
             # Mapping types to columns
@@ -39,41 +198,95 @@ class Logging(commands.Cog):
             # Fallback to general log channel if specific one isn't set
             if not channel_id:
                 channel_id = config['log_channel_id']
-            
-            print(f"DEBUG: Attempting to log {log_type} to channel {channel_id} in {guild.id}")
-            
+
             if channel_id:
-                channel = guild.get_channel(channel_id)
-                if not channel:
-                    try:
-                        print(f"DEBUG: Channel {channel_id} not in cache, fetching...")
-                        channel = await guild.fetch_channel(channel_id)
-                    except Exception as fe:
-                        print(f"DEBUG: Fetch channel failed: {fe}")
-                        channel = None
-                        
+                channel = await channel_resolver.resolve(guild, channel_id)
                 if channel:
-                    await channel.send(embed=embed)
+                    log_dispatcher.send(channel, embed)
                 else:
-                    print(f"DEBUG: Could not find channel {channel_id}")
+                    instrumentation.count("log_channel.missing", f"Log channel {channel_id} for {log_type} logs in guild {guild.id} is unreachable")
             else:
-                print(f"DEBUG: No channel ID configured for {log_type} or fallback")
+                instrumentation.count("log_channel.unset")
         except Exception as e:
-            print(f"DEBUG: Error sending log: {e}")
+            instrumentation.count("log_channel.error", f"Error sending {log_type} log in guild {guild.id}: {e}", logging.ERROR)
 
     async def is_enabled(self, guild_id, facility):
         try:
-            config = await db.fetchrow(f"SELECT {facility} FROM guild_config WHERE guild_id = $1", guild_id)
-            status = config[facility] if (config and config[facility] is not None) else True
-            print(f"DEBUG: Facility {facility} enabled status: {status}")
-            return status
+            config = await db.get_guild_config(guild_id)
+            return config[facility] if (config and config[facility] is not None) else True
         except Exception as e:
-            print(f"DEBUG: is_enabled check failed for {facility}: {e}")
+            instrumentation.count("log_facility.error", f"is_enabled check failed for {facility} in guild {guild_id}: {e}", logging.ERROR)
             return True
 
+    @tasks.loop(seconds=30)
+    async def raid_summaries(self):
+        for guild_id, summary in raid_detector.take_summaries():
+            guild = self.bot.get_guild(guild_id)
+            if not guild:
+                continue
+
+            actioned = 0
+            if summary["flagged"] and Config.RAID_ACTION in ("timeout", "kick"):
+                results = await asyncio.gather(*(self.raid_action(m) for m in summary["flagged"]))
+                actioned = sum(results)
+
+            title = "Raid Mode Ended" if summary["ended"] else "Raid Mode Active"
+            embed = discord.Embed(
+                title=title,
+                description=f"`{summary['joins']}` member(s) joined since the last update.",
+                color=Config.COLOR_SUCCESS if summary["ended"] else Config.COLOR_ERROR,
+                timestamp=datetime.datetime.now()
+            )
+            if summary["started_at"]:
+                embed.add_field(name="Started", value=discord.utils.format_dt(summary["started_at"], "R"), inline=True)
+            embed.add_field(name="Flagged Accounts", value=f"`{len(summary['flagged'])}`", inline=True)
+            if Config.RAID_ACTION in ("timeout", "kick"):
+                embed.add_field(name=f"Action ({Config.RAID_ACTION})", value=f"`{actioned}` applied", inline=True)
+            embed.add_field(
+                name="Account Age",
+                value="\n".join(f"{label}: `{count}`" for label, count in summary["histogram"]),
+                inline=False
+            )
+            await self.send_log_channel(guild, embed, "member")
+
+    @raid_summaries.error
+    async def raid_summaries_error(self, error):
+        logging.error(f"Raid summary task failed: {error}")
+
+    async def raid_action(self, member):
+        reason = "Raid protection: new account joined during raid"
+        async with self.raid_action_limit:
+            try:
+                if Config.RAID_ACTION == "timeout":
+                    await member.timeout(datetime.timedelta(hours=1), reason=reason)
+                else:
+                    await member.kick(reason=reason)
+            except discord.HTTPException as e:
+                logging.warning(f"Raid {Config.RAID_ACTION} failed for {member.id}: {e}")
+                return False
+        await self.log_to_db(member.guild.id, member.id, f"raid_{Config.RAID_ACTION}")
+        return True
+
     @commands.Cog.listener()
     async def on_member_join(self, member):
-        print(f"DEBUG: Member joined guild {member.guild.id}")
+        # Raid detection needs accurate join times, so it runs before any queueing
+        raid_state = raid_detector.record_join(member)
+        guild_scheduler.submit(member.guild.id, self.log_member_join, member, raid_state)
+
+    async def log_member_join(self, member, raid_state):
+        if raid_state != NORMAL:
+            # Individual notifications are replaced by raid_summaries
+            if raid_state == RAID_STARTED:
+                embed = discord.Embed(
+                    title="Raid Detected",
+                    description=f"`{Config.RAID_JOIN_THRESHOLD}`+ members joined within `{Config.RAID_WINDOW_SECONDS}s`. Join notifications will be summarised every `{Config.RAID_SUMMARY_SECONDS}s`.",
+                    color=Config.COLOR_ERROR,
+                    timestamp=datetime.datetime.now()
+                )
+                await self.send_log_channel(member.guild, embed, "member")
+            await self.log_to_db(member.guild.id, member.id, "member_join")
+            return
+
         if not await self.is_enabled(member.guild.id, "log_member_joins"):
             return
 
@@ -100,66 +313,89 @@ class Logging(commands.Cog):
             await self.send_log_channel(member.guild, warn_embed)
 
     @commands.Cog.listener()
-    async def on_member_remove(self, member):
-        # Check if it was a kick
-        is_kick = False
-        moderator = None
-        reason = None
-        
-        try:
-            async for entry in member.guild.audit_logs(limit=1, action=discord.AuditLogAction.kick):
-                now = datetime.datetime.now(datetime.timezone.utc)
-                if entry.target.id == member.id and (now - entry.created_at).total_seconds() < 10:
-                    is_kick = True
-                    moderator = entry.user
-                    reason = entry.reason
-                    break
-        except Exception as e:
-            print(f"DEBUG: Failed to check audit logs for kick: {e}")
+    async def on_guild_channel_create(self, channel):
+        channel_resolver.invalidate(channel.id)
 
-        if is_kick:
-            # Log as Kick
-            embed = discord.Embed(
-                title="Member Kicked",
-                description=f"{member.mention} `{member}`",
-                color=Config.COLOR_ERROR,
-                timestamp=datetime.datetime.now()
-            )
-            embed.set_thumbnail(url=member.display_avatar.url)
-            embed.add_field(name="Moderator", value=moderator.mention if moderator else "Unknown", inline=True)
-            embed.add_field(name="Reason", value=reason or "No reason provided", inline=False)
-            embed.set_footer(text=f"ID: {member.id}")
-            
-            await self.send_log_channel(member.guild, embed, "mod")
-            await self.log_to_db(member.guild.id, member.id, "kick", details=f"By {moderator} for {reason}")
-            
-        else:
-            # Log as Leave
-            if not await self.is_enabled(member.guild.id, "log_member_leaves"):
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        channel_resolver.invalidate(channel.id)
+
+    # Audit log actions some listener resolves; everything else is never looked up
+    CORRELATED_ACTIONS = frozenset({
+        discord.AuditLogAction.kick,
+        discord.AuditLogAction.ban,
+        discord.AuditLogAction.unban,
+    })
+
+    @commands.Cog.listener()
+    async def on_audit_log_entry_create(self, entry):
+        if entry.action == discord.AuditLogAction.member_update:
+            # Only timeouts being added are resolved; removals are logged without a moderator
+            if getattr(entry.after, "timed_out_until", None) is None:
                 return
-    
-            embed = discord.Embed(
-                title="Member Left", 
-                description=f"{member.mention} `{member}`",
-                color=Config.COLOR_ERROR,
-                timestamp=datetime.datetime.now()
-            )
-            embed.set_footer(text=f"ID: {member.id}")
-            await self.send_log_channel(member.guild, embed, "member")
-            await self.log_to_db(member.guild.id, member.id, "member_leave")
+        elif entry.action not in self.CORRELATED_ACTIONS:
+            return
+        audit_log_index.add(entry)
+
+    # Audit log entries are awaited in the listeners themselves, which cost nothing while
+    # waiting; only the logging work goes through the scheduler, so a wait never holds a slot.
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        guild = member.guild
+        # Most removals are plain leaves with no audit entry, so only wait briefly for a kick
+        entry = await audit_log_index.resolve(guild.id, discord.AuditLogAction.kick, member.id, wait=Config.AUDIT_LOG_KICK_WAIT_SECONDS)
+        if entry:
+            guild_scheduler.submit(guild.id, self.log_member_kick, member, entry, False)
+            return
+
+        guild_scheduler.submit(guild.id, self.log_member_leave, member)
+        # A kick entry that turns up late upgrades the leave to a kick
+        late_wait = Config.AUDIT_LOG_WAIT_SECONDS - Config.AUDIT_LOG_KICK_WAIT_SECONDS
+        if late_wait > 0:
+            entry = await audit_log_index.resolve(guild.id, discord.AuditLogAction.kick, member.id, wait=late_wait)
+            if entry:
+                guild_scheduler.submit(guild.id, self.log_member_kick, member, entry, True)
+
+    async def log_member_kick(self, member, entry, late):
+        moderator = entry.user
+        reason = entry.reason
+        embed = discord.Embed(
+            title="Member Kicked",
+            description=f"{member.mention} `{member}`",
+            color=Config.COLOR_ERROR,
+            timestamp=datetime.datetime.now()
+        )
+        embed.set_thumbnail(url=member.display_avatar.url)
+        embed.add_field(name="Moderator", value=moderator.mention if moderator else "Unknown", inline=True)
+        embed.add_field(name="Reason", value=reason or "No reason provided", inline=False)
+        embed.set_footer(text=f"ID: {member.id}" + (" | Earlier logged as a leave" if late else ""))
+
+        await self.send_log_channel(member.guild, embed, "mod")
+        await self.log_to_db(member.guild.id, member.id, "kick", details=f"By {moderator} for {reason}")
+
+    async def log_member_leave(self, member):
+        if not await self.is_enabled(member.guild.id, "log_member_leaves"):
+            return
+
+        embed = discord.Embed(
+            title="Member Left", 
+            description=f"{member.mention} `{member}`",
+            color=Config.COLOR_ERROR,
+            timestamp=datetime.datetime.now()
+        )
+        embed.set_footer(text=f"ID: {member.id}")
+        await self.send_log_channel(member.guild, embed, "member")
+        await self.log_to_db(member.guild.id, member.id, "member_leave")
 
     @commands.Cog.listener()
     async def on_member_ban(self, guild, user):
-        moderator = None
-        reason = None
-        try:
-            async for entry in guild.audit_logs(limit=1, action=discord.AuditLogAction.ban):
-                if entry.target.id == user.id:
-                    moderator = entry.user
-                    reason = entry.reason
-                    break
-        except:
-            pass
+        entry = await audit_log_index.resolve(guild.id, discord.AuditLogAction.ban, user.id)
+        guild_scheduler.submit(guild.id, self.log_member_ban, guild, user, entry)
+
+    async def log_member_ban(self, guild, user, entry):
+        moderator = entry.user if entry else None
+        reason = entry.reason if entry else None
             
         embed = discord.Embed(
             title="Member Banned",
@@ -179,14 +415,11 @@ class Logging(commands.Cog):
 
     @commands.Cog.listener()
     async def on_member_unban(self, guild, user):
-        moderator = None
-        try:
-            async for entry in guild.audit_logs(limit=1, action=discord.AuditLogAction.unban):
-                if entry.target.id == user.id:
-                    moderator = entry.user
-                    break
-        except:
-            pass
+        entry = await audit_log_index.resolve(guild.id, discord.AuditLogAction.unban, user.id)
+        guild_scheduler.submit(guild.id, self.log_member_unban, guild, user, entry)
+
+    async def log_member_unban(self, guild, user, entry):
+        moderator = entry.user if entry else None
 
         embed = discord.Embed(
             title="Member Unbanned",
@@ -202,49 +435,47 @@ class Logging(commands.Cog):
 
     @commands.Cog.listener()
     async def on_member_update(self, before, after):
-        # Check for timeout changes
-        if before.timed_out_until != after.timed_out_until:
-            guild = after.guild
-            if after.timed_out_until:
-                # Timeout Added
-                moderator = None
-                reason = None
-                try:
-                    async for entry in guild.audit_logs(limit=1, action=discord.AuditLogAction.member_update):
-                         if entry.target.id == after.id:
-                             # We can't be 100% sure it's this entry easily without more checks but it's the best guess
-                             moderator = entry.user
-                             reason = entry.reason
-                             break
-                except:
-                    pass
-                
-                embed = discord.Embed(
-                    title="Member Timed Out",
-                    description=f"{after.mention} `{after}`",
-                    color=Config.COLOR_ERROR,
-                    timestamp=datetime.datetime.now()
-                )
-                embed.add_field(name="Duration", value=f"Until {discord.utils.format_dt(after.timed_out_until)}", inline=False)
-                embed.add_field(name="Moderator", value=moderator.mention if moderator else "Unknown", inline=True)
-                embed.add_field(name="Reason", value=reason or "No reason provided", inline=False)
-                
-                await self.send_log_channel(guild, embed, "mod")
-                await self.log_to_db(guild.id, after.id, "timeout", details=f"Until {after.timed_out_until}")
-            else:
-                 # Timeout Removed
-                embed = discord.Embed(
-                    title="Timeout Removed",
-                    description=f"{after.mention} `{after}`",
-                    color=Config.COLOR_SUCCESS,
-                    timestamp=datetime.datetime.now()
-                )
-                await self.send_log_channel(guild, embed, "mod")
-                await self.log_to_db(guild.id, after.id, "remove_timeout")
+        # Only timeout changes are logged
+        if before.timed_out_until == after.timed_out_until:
+            return
+        entry = None
+        if after.timed_out_until:
+            entry = await audit_log_index.resolve(after.guild.id, discord.AuditLogAction.member_update, after.id)
+        guild_scheduler.submit(after.guild.id, self.log_timeout_change, after, entry)
+
+    async def log_timeout_change(self, after, entry):
+        guild = after.guild
+        if after.timed_out_until:
+            # Timeout Added
+            moderator = entry.user if entry else None
+            reason = entry.reason if entry else None
+            
+            embed = discord.Embed(
+                title="Member Timed Out",
+                description=f"{after.mention} `{after}`",
+                color=Config.COLOR_ERROR,
+                timestamp=datetime.datetime.now()
+            )
+            embed.add_field(name="Duration", value=f"Until {discord.utils.format_dt(after.timed_out_until)}", inline=False)
+            embed.add_field(name="Moderator", value=moderator.mention if moderator else "Unknown", inline=True)
+            embed.add_field(name="Reason", value=reason or "No reason provided", inline=False)
+            
+            await self.send_log_channel(guild, embed, "mod")
+            await self.log_to_db(guild.id, after.id, "timeout", details=f"Until {after.timed_out_until}")
+        else:
+            # Timeout Removed
+            embed = discord.Embed(
+                title="Timeout Removed",
+                description=f"{after.mention} `{after}`",
+                color=Config.COLOR_SUCCESS,
+                timestamp=datetime.datetime.now()
+            )
+            await self.send_log_channel(guild, embed, "mod")
+            await self.log_to_db(guild.id, after.id, "remove_timeout")
 
     @commands.Cog.listener()
+    @scheduled
     async def on_message_edit(self, before, after):
-        print(f"DEBUG: Message edit detected in {before.guild.id if before.guild else 'DM'}")
         if before.author.bot or before.content == after.content:
             return
         
@@ -265,6 +496,7 @@ class Logging(commands.Cog):
         await self.log_to_db(before.guild.id, before.author.id, "message_edit", before.id, f"Chan: {before.channel.id}")
 
     @commands.Cog.listener()
+    @scheduled
     async def on_message_delete(self, message):
         if message.author.bot:
             return
@@ -302,6 +534,7 @@ class Logging(commands.Cog):
         await self.log_to_db(message.guild.id, message.author.id, "message_delete", message.id, details)
 
     @commands.Cog.listener()
+    @scheduled
     async def on_voice_state_update(self, member, before, after):
         if before.channel == after.channel:
             return
@@ -331,21 +564,37 @@ class Logging(commands.Cog):
         await self.send_log_channel(member.guild, embed, "voice")
         await self.log_to_db(member.guild.id, member.id, action, details=details)
 
-    @discord.app_commands.command(name="logs", description="View recent server logs")
+    @discord.app_commands.command(name="logs", description="Browse server logs")
     @discord.app_commands.checks.has_permissions(manage_guild=True)
-    async def view_logs(self, interaction: discord.Interaction, limit: int = 10):
-        logs = await db.fetch("SELECT * FROM server_logs WHERE guild_id = $1 ORDER BY created_at DESC LIMIT $2", interaction.guild.id, limit)
-        if not logs:
-            embed = discord.Embed(description="No logs found.", color=Config.COLOR_ERROR)
+    @discord.app_commands.describe(
+        limit="Logs per page (1-25)",
+        action="Only this kind of event",
+        user="Only events by this user",
+        since="Start of the range: 30m, 12h, 7d, 2w or a date like 2024-05-01",
+        until="End of the range, same formats as since"
+    )
+    @discord.app_commands.choices(action=[discord.app_commands.Choice(name=a, value=a) for a in LOG_ACTIONS])
+    async def view_logs(
+        self,
+        interaction: discord.Interaction,
+        limit: discord.app_commands.Range[int, 1, 25] = 10,
+        action: str = None,
+        user: discord.User = None,
+        since: str = None,
+        until: str = None
+    ):
+        try:
+            since_at = parse_when(since) if since else None
+            until_at = parse_when(until) if until else None
+        except ValueError:
+            embed = discord.Embed(description="Couldn't read that time. Use `30m`, `12h`, `7d`, `2w` or a date like `2024-05-01`.", color=Config.COLOR_ERROR)
             return await interaction.response.send_message(embed=embed, ephemeral=True)
-        
-        description = ""
-        for log in logs:
-            user = self.bot.get_user(log['user_id']) or log['user_id']
-            description += f"- **{log['action_type']}** | {user} | {log['details'] or ''}\n"
-        
-        embed = discord.Embed(title="Recent Logs", description=description[:4000], color=Config.COLOR_NEUTRAL)
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+        view = LogBrowser(interaction.user, interaction.guild.id, limit, action, user.id if user else None, since_at, until_at)
+        await view.load_first()
+        if not view.rows:
+            return await interaction.response.send_message(embed=view.get_embed(), ephemeral=True)
+        await interaction.response.send_message(embed=view.get_embed(), view=view, ephemeral=True)
 
 async def setup(bot):
     await bot.add_cog(Logging(bot))
@@ -2,46 +2,53 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from database import db
+from log_writer import log_writer
+from log_dispatcher import log_dispatcher
+from channels import channel_resolver
+from word_filter import word_filters
+from automod import automod
+from spam import spam_tracker
+from metrics import instrumentation
+from scheduler import guild_scheduler
 from config import Config
 import logging
 import datetime
 import typing
 
+INSERT_PUNISHMENT = db.query(
+    "punishments.insert",
+    "INSERT INTO punishments (guild_id, user_id, moderator_id, type, reason) VALUES ($1, $2, $3, $4, $5)"
+)
+
 class Moderation(commands.Cog):
+    # Automod reads message content
+    REQUIRED_INTENTS = ("guild_messages", "message_content")
+
     def __init__(self, bot):
         self.bot = bot
 
     async def log_action(self, guild, moderator, user, action_type, reason=None):
         # Insert into DB (Punishments table)
-        await db.execute(
-            "INSERT INTO punishments (guild_id, user_id, moderator_id, type, reason) VALUES ($1, $2, $3, $4, $5)",
-            guild.id, user.id, moderator.id, action_type, reason
-        )
+        await db.execute(INSERT_PUNISHMENT, guild.id, user.id, moderator.id, action_type, reason)
         # Also insert into generic logs for redundancy if needed, but punishments table is best for mod actions
         
         # Log to channel
         try:
-            config = await db.fetchrow("SELECT log_channel_id, mod_log_channel_id FROM guild_config WHERE guild_id = $1", guild.id)
+            config = await db.get_guild_config(guild.id)
             channel_id = None
             if config:
                 channel_id = config['mod_log_channel_id'] or config['log_channel_id']
             
             if channel_id:
-                channel = guild.get_channel(channel_id)
-                if not channel:
-                    try:
-                        channel = await guild.fetch_channel(channel_id)
-                    except:
-                        channel = None
-                
+                channel = await channel_resolver.resolve(guild, channel_id)
                 if channel:
                     embed = discord.Embed(title=f"Action: {action_type}", color=Config.COLOR_ERROR, timestamp=datetime.datetime.now())
                     embed.add_field(name="User", value=f"`{user}` (`{user.id}`)", inline=True)
                     embed.add_field(name="Moderator", value=f"`{moderator}` (`{moderator.id}`)", inline=True)
                     embed.add_field(name="Reason", value=f"`{reason}`", inline=False)
-                    await channel.send(embed=embed)
+                    log_dispatcher.send(channel, embed)
         except Exception as e:
-            print(f"DEBUG: log_action failed: {e}")
+            instrumentation.count("mod_log.error", f"log_action failed in guild {guild.id}: {e}", logging.ERROR)
 
     @app_commands.command(name="warn", description="Warn a user")
     @app_commands.checks.has_permissions(manage_messages=True)
@@ -65,9 +72,8 @@ class Moderation(commands.Cog):
         
         # Log purge
         # Manual insert or log_action adaptation
-        await db.execute(
-            "INSERT INTO server_logs (guild_id, user_id, action_type, details) VALUES ($1, $2, $3, $4)",
-            interaction.guild.id, interaction.user.id, "purge", f"Purged {len(deleted)} messages in {interaction.channel.name}"
+        await log_writer.add(
+            interaction.guild.id, interaction.user.id, "purge", details=f"Purged {len(deleted)} messages in {interaction.channel.name}"
         )
 
     @commands.Cog.listener()
@@ -76,9 +82,21 @@ class Moderation(commands.Cog):
             return
 
         if not message.guild: return
-        
-        config = await db.fetchrow("SELECT automod_invite_links FROM guild_config WHERE guild_id = $1", message.guild.id)
-        if config and config['automod_invite_links']:
+
+        # Automod: Spam / Flood (in-memory, no DB access). Runs before queueing
+        # so message rates are measured as they arrive.
+        if not message.author.guild_permissions.manage_messages:
+            spam_reason = spam_tracker.record(message)
+            if spam_reason:
+                guild_scheduler.submit(message.guild.id, self.punish_spam, message, spam_reason, enforce=True)
+                return
+
+        # Never shed: the spam tracker has already counted this message
+        guild_scheduler.submit(message.guild.id, self.moderate_message, message, enforce=True)
+
+    async def moderate_message(self, message):
+        config = await db.get_guild_config(message.guild.id)
+        if config and config.get('automod_invite_links'):
             # Automod: Invite Links
             if "discord.gg/" in message.content or "discord.com/invite/" in message.content:
                 await message.delete()
@@ -87,16 +105,61 @@ class Moderation(commands.Cog):
                 
                 # Log Automod
                 await self.log_action(message.guild, self.bot.user, message.author, "automod_invite", "Posted invite link")
+                return
         
         # Automod: Word Filters
-        filters = await db.fetch("SELECT phrase FROM word_filters WHERE guild_id = $1", message.guild.id)
-        for f in filters:
-            if f['phrase'].lower() in message.content.lower():
-                await message.delete()
-                embed = discord.Embed(description=f"{message.author.mention} Your message contains a forbidden phrase!", color=Config.COLOR_ERROR)
-                await message.channel.send(embed=embed, delete_after=5)
-                await self.log_action(message.guild, self.bot.user, message.author, "automod_phrase", f"Phrase: {f['phrase']}")
-                break
+        phrase = await word_filters.find(message.guild.id, message.content)
+        if phrase:
+            await message.delete()
+            embed = discord.Embed(description=f"{message.author.mention} Your message contains a forbidden phrase!", color=Config.COLOR_ERROR)
+            await message.channel.send(embed=embed, delete_after=5)
+            await self.log_action(message.guild, self.bot.user, message.author, "automod_phrase", f"Phrase: {phrase}")
+            return
+
+        # Automod: Custom Rules
+        rule = await automod.check(message)
+        if rule:
+            await self.apply_automod_rule(message, rule)
+
+    async def punish_spam(self, message, reason):
+        try:
+            await message.author.timeout(datetime.timedelta(minutes=Config.AUTOMOD_TIMEOUT_MINUTES), reason=reason)
+        except discord.HTTPException as e:
+            logging.warning(f"Spam timeout failed for {message.author.id} in {message.guild.id}: {e}")
+            return
+
+        embed = discord.Embed(description=f"{message.author.mention} has been timed out for spamming.", color=Config.COLOR_ERROR)
+        await message.channel.send(embed=embed, delete_after=5)
+        await self.log_action(message.guild, self.bot.user, message.author, "automod_spam", reason)
+
+    async def apply_automod_rule(self, message, rule):
+        punishment = rule.punishment_type
+        reason = f"Automod rule #{rule.id} ({rule.rule_type})"
+        try:
+            await message.delete()
+        except discord.NotFound:
+            pass
+
+        embed = discord.Embed(description=f"{message.author.mention} Your message was removed by automod.", color=Config.COLOR_ERROR)
+        await message.channel.send(embed=embed, delete_after=5)
+
+        try:
+            if punishment == "timeout":
+                await message.author.timeout(datetime.timedelta(minutes=Config.AUTOMOD_TIMEOUT_MINUTES), reason=reason)
+            elif punishment == "kick":
+                await message.author.kick(reason=reason)
+            elif punishment == "ban":
+                await message.author.ban(reason=reason, delete_message_seconds=0)
+            elif punishment == "warn":
+                try:
+                    dm = discord.Embed(description=f"You have been warned in `{message.guild.name}`.\nReason: `{reason}`", color=Config.COLOR_ERROR)
+                    await message.author.send(embed=dm)
+                except:
+                    pass
+        except discord.HTTPException as e:
+            logging.warning(f"Automod {punishment} failed for {message.author.id} in {message.guild.id}: {e}")
+
+        await self.log_action(message.guild, self.bot.user, message.author, f"automod_{punishment}", reason)
 
     @app_commands.command(name="lock", description="Lock the current channel")
     @app_commands.checks.has_permissions(manage_channels=True)
@@ -3,8 +3,12 @@ from discord import app_commands
 from discord.ext import commands
 from database import db
 from config import Config
+from channels import channel_resolver
+from ticket_registry import ticket_registry
+from ticket_reasons import ticket_reasons
+from ticket_capture import ticket_messages
+from transcripts import TranscriptWriter, save_transcript
 import logging
-import io
 import os
 import asyncio
 
@@ -34,11 +38,12 @@ class TicketReasonSelect(discord.ui.View):
         self.guild_id = guild_id
 
     async def populate_reasons(self):
-        reasons = await db.fetch("SELECT id, label, description, emoji FROM ticket_reasons WHERE guild_id = $1", self.guild_id)
+        reasons = await ticket_reasons.get(self.guild_id)
         if not reasons:
             self.select_reason.add_option(label="General Support", value="default", description="General inquiries", emoji="🎟️")
         else:
-            for r in reasons:
+            # A select menu holds at most 25 options
+            for r in list(reasons.values())[:25]:
                 self.select_reason.add_option(
                     label=r['label'], 
                     value=str(r['id']), 
@@ -50,6 +55,8 @@ class TicketReasonSelect(discord.ui.View):
     async def select_reason(self, interaction: discord.Interaction, select: discord.ui.Select):
         value = select.values[0]
         guild = interaction.guild
+        # Respond to the interaction before anything that may need a REST call (channel_resolver)
+        await interaction.response.defer(ephemeral=True)
         
         # Determine category and staff roles
         target_category_id = None
@@ -57,17 +64,17 @@ class TicketReasonSelect(discord.ui.View):
         reason_label = "General Support"
         
         if value != "default":
-            reason_data = await db.fetchrow("SELECT label, category_id, required_roles FROM ticket_reasons WHERE id = $1", int(value))
+            reason_data = await ticket_reasons.reason(guild.id, int(value))
             if reason_data:
                 reason_label = reason_data['label']
                 target_category_id = reason_data['category_id']
                 required_roles = reason_data['required_roles'] or []
 
+        config = await db.get_guild_config(guild.id)
+
         # Fallback category
-        if not target_category_id:
-            config = await db.fetchrow("SELECT ticket_category_id, mod_role_id, admin_role_id FROM guild_config WHERE guild_id = $1", guild.id)
-            if config:
-                target_category_id = config['ticket_category_id']
+        if not target_category_id and config:
+            target_category_id = config['ticket_category_id']
 
         overwrites = {
             guild.default_role: discord.PermissionOverwrite(read_messages=False),
@@ -76,17 +83,13 @@ class TicketReasonSelect(discord.ui.View):
         }
 
         # Staff Roles
-        config = await db.fetchrow("SELECT mod_role_id, admin_role_id FROM guild_config WHERE guild_id = $1", guild.id)
         if config:
             for r_id in [config['mod_role_id'], config['admin_role_id']]:
                 if r_id:
                     role = guild.get_role(r_id)
                     if role: overwrites[role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
 
-        category = guild.get_channel(target_category_id) if target_category_id else None
-        
-        # Respond to interaction immediately to avoid timeout/Responded errors
-        await interaction.response.defer(ephemeral=True)
+        category = await channel_resolver.resolve(guild, target_category_id)
         
         ticket_channel = await guild.create_text_channel(
             name=f"ticket-{interaction.user.name}",
@@ -96,10 +99,11 @@ class TicketReasonSelect(discord.ui.View):
         )
 
         # Database record
-        await db.execute(
-            "INSERT INTO tickets (guild_id, channel_id, owner_id, reason_id) VALUES ($1, $2, $3, $4)",
+        ticket_id = await db.fetchval(
+            "INSERT INTO tickets (guild_id, channel_id, owner_id, reason_id) VALUES ($1, $2, $3, $4) RETURNING id",
             guild.id, ticket_channel.id, interaction.user.id, int(value) if value != "default" else None
         )
+        ticket_registry.add(ticket_id, guild.id, ticket_channel.id, interaction.user.id)
 
         # Welcome Embed
         embed = discord.Embed(
@@ -124,7 +128,10 @@ class TicketControls(discord.ui.View):
 
     @discord.ui.button(label="Claim", style=discord.ButtonStyle.green, custom_id="ticket_claim_btn")
     async def claim_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await db.execute("UPDATE tickets SET claimed_by = $1 WHERE channel_id = $2", interaction.user.id, interaction.channel.id)
+        ticket = ticket_registry.get(interaction.channel.id)
+        if ticket:
+            await db.execute("UPDATE tickets SET claimed_by = $1 WHERE id = $2", interaction.user.id, ticket.id)
+            ticket.claimed_by = interaction.user.id
         
         embed = discord.Embed(
             title="Ticket Claimed",
@@ -156,7 +163,10 @@ class TicketCloseConfirm(discord.ui.View):
     @discord.ui.button(label="Confirm Close", style=discord.ButtonStyle.danger)
     async def confirm_close(self, interaction: discord.Interaction, button: discord.ui.Button):
         channel = interaction.channel
-        await db.execute("UPDATE tickets SET status = 'closed', closed_at = CURRENT_TIMESTAMP WHERE channel_id = $1", channel.id)
+        ticket = ticket_registry.get(channel.id)
+        if ticket:
+            await db.execute("UPDATE tickets SET status = 'closed', closed_at = CURRENT_TIMESTAMP WHERE id = $1", ticket.id)
+            ticket.status = "closed"
         
         for target, overwrite in channel.overwrites.items():
             if isinstance(target, discord.Member) and not target.bot:
@@ -172,58 +182,61 @@ class TicketManagement(discord.ui.View):
 
     @discord.ui.button(label="Transcript", style=discord.ButtonStyle.secondary, custom_id="ticket_transcript_btn")
     async def transcript(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.defer(ephemeral=True)
         channel = interaction.channel
-        messages = [message async for message in channel.history(limit=5000, oldest_first=True)]
-        
-        html_content = "<html><body><h1>Ticket Transcript</h1>"
-        for msg in messages:
-            html_content += f"<p><strong>{msg.author}:</strong> {msg.content}</p>"
-        html_content += "</body></html>"
-        
-        # Save to DB instead of file for web panel access
-        transcript_text = html_content
-        await db.execute("UPDATE tickets SET transcript_text = $1 WHERE channel_id = $2", transcript_text, channel.id)
-        
-        # Save as text file for download
-        file = discord.File(io.BytesIO(html_content.encode('utf-8')), filename=f"transcript-{channel.name}.html")
-        
-        url = f"http://localhost:8000/transcripts/{channel.id}" # Base URL should be config, but hardcoded for local dev as web panel is local
-        # We need the ticket ID, not channel ID for URL if we follow web panel logic, but map is 1:1 if we fetch right.
-        # Actually web panel uses ticket.id (PK), so we need to fetch that.
-        ticket_id = await db.fetchval("SELECT id FROM tickets WHERE channel_id = $1", channel.id)
-        if ticket_id:
-             url = f"http://localhost:8000/transcripts/{ticket_id}"
-
-        embed = discord.Embed(description=f"Transcript saved.\n[View Online]({url})", color=Config.COLOR_SUCCESS)
-        await interaction.response.send_message(embed=embed, file=file, ephemeral=True)
+        ticket = ticket_registry.get(channel.id)
+        if ticket is None:
+            embed = discord.Embed(description="No ticket record found for this channel.", color=Config.COLOR_ERROR)
+            return await interaction.followup.send(embed=embed, ephemeral=True)
+
+        # No-op unless the bot was offline while the ticket was open
+        await ticket_messages.catch_up(channel)
+        with TranscriptWriter(f"Transcript: #{channel.name}") as writer:
+            # Rendered from the captured messages and saved to DB for web panel access
+            await save_transcript(ticket.id, writer)
+
+            url = f"http://localhost:8000/transcripts/{ticket.id}" # Base URL should be config, but hardcoded for local dev as web panel is local
+            embed = discord.Embed(description=f"Transcript saved ({writer.messages} messages).\n[View Online]({url})", color=Config.COLOR_SUCCESS)
+            if writer.size > interaction.guild.filesize_limit:
+                embed.description += "\nToo large to attach here, use the link instead."
+                return await interaction.followup.send(embed=embed, ephemeral=True)
+
+            # Attach the plain HTML copy for download
+            file = discord.File(writer.html, filename=f"transcript-{channel.name}.html")
+            await interaction.followup.send(embed=embed, file=file, ephemeral=True)
 
     @discord.ui.button(label="Delete", style=discord.ButtonStyle.danger, custom_id="ticket_delete_btn")
     async def delete_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
         embed = discord.Embed(description="Deleting ticket in 5 seconds...", color=Config.COLOR_ERROR)
         await interaction.channel.send(embed=embed)
+
+        # Keep a transcript of the deleted channel, it can't be exported afterwards
+        ticket = ticket_registry.get(interaction.channel.id)
+        if ticket is not None:
+            await ticket_messages.catch_up(interaction.channel)
+            with TranscriptWriter(f"Transcript: #{interaction.channel.name}") as writer:
+                await save_transcript(ticket.id, writer)
+
         await asyncio.sleep(5)
         await interaction.channel.delete()
+        # on_guild_channel_delete drops it from the registry
 
     @discord.ui.button(label="Reopen", style=discord.ButtonStyle.primary, custom_id="ticket_reopen_btn")
     async def reopen_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.defer(ephemeral=True)
         channel = interaction.channel
-        await db.execute("UPDATE tickets SET status = 'open', closed_at = NULL WHERE channel_id = $1", channel.id)
-        
-        ticket_data = await db.fetchrow("SELECT id, owner_id FROM tickets WHERE channel_id = $1", channel.id)
+        ticket = ticket_registry.get(channel.id)
         
         users_to_add = set()
         msg_parts = []
         
-        if ticket_data:
-            owner_id = ticket_data['owner_id']
-            ticket_id = ticket_data['id']
-            users_to_add.add(owner_id)
+        if ticket:
+            await db.execute("UPDATE tickets SET status = 'open', closed_at = NULL WHERE id = $1", ticket.id)
+            ticket.status = "open"
+            users_to_add.add(ticket.owner_id)
             
-            # Fetch added members
-            members = await db.fetch("SELECT user_id FROM ticket_members WHERE ticket_id = $1", ticket_id)
-            for m in members:
-                users_to_add.add(m['user_id'])
+            # Added members
+            users_to_add.update(ticket.members)
             
             restored_count = 0
             for user_id in users_to_add:
@@ -252,6 +265,8 @@ class TicketManagement(discord.ui.View):
 
 
 class Tickets(commands.Cog):
+    REQUIRED_INTENTS = ("guild_messages", "message_content")
+
     def __init__(self, bot):
         self.bot = bot
 
@@ -260,7 +275,45 @@ class Tickets(commands.Cog):
         self.bot.add_view(TicketLauncher())
         self.bot.add_view(TicketControls())
         self.bot.add_view(TicketManagement())
-        
+
+    # Transcript capture: ticket channel messages go to ticket_messages as they happen
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Tickets whose channel was deleted while the bot was offline
+        stale = []
+        for ticket in ticket_registry.records():
+            guild = self.bot.get_guild(ticket.guild_id)
+            if guild is not None and not guild.unavailable and guild.get_channel(ticket.channel_id) is None:
+                stale.append(ticket.channel_id)
+        for channel_id in stale:
+            ticket_messages.forget(channel_id)
+        await ticket_registry.forget(*stale)
+
+        ticket_messages.start_catch_up(self.bot)
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        await ticket_messages.add_message(message)
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload):
+        await ticket_messages.edit(payload)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        await ticket_messages.delete(payload.channel_id, [payload.message_id])
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload):
+        await ticket_messages.delete(payload.channel_id, payload.message_ids)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        if ticket_registry.get(channel.id):
+            ticket_messages.forget(channel.id)
+            await ticket_registry.forget(channel.id)
+
     @app_commands.command(name="setup_ticket_panel", description="Send the professional ticket creation panel")
     @app_commands.checks.has_permissions(administrator=True)
     async def setup_ticket_panel(self, interaction: discord.Interaction, channel: discord.TextChannel):
@@ -288,7 +341,7 @@ class Tickets(commands.Cog):
     @app_commands.command(name="ticket_panel", description="Resend the ticket control panel (for closed tickets)")
     @app_commands.checks.has_permissions(manage_messages=True)
     async def ticket_panel(self, interaction: discord.Interaction):
-        if "ticket-" not in interaction.channel.name:
+        if ticket_registry.get(interaction.channel.id) is None:
              return await interaction.response.send_message("Not a ticket channel.", ephemeral=True)
         
         embed = discord.Embed(description="Ticket Controls", color=Config.COLOR_NEUTRAL)
@@ -304,6 +357,7 @@ class Tickets(commands.Cog):
             "INSERT INTO ticket_reasons (guild_id, label, category_id, description, emoji) VALUES ($1, $2, $3, $4, $5)",
             interaction.guild.id, label, category.id, description, emoji
         )
+        ticket_reasons.invalidate(interaction.guild.id)
         await interaction.response.send_message(embed=discord.Embed(description=f"Added reason: `{label}`", color=Config.COLOR_SUCCESS), ephemeral=True)
 
     @app_commands.command(name="status_panel", description="Create a live status panel")
@@ -311,10 +365,18 @@ class Tickets(commands.Cog):
         guild_id = interaction.guild.id
         
         # Fetch ticket statistics
-        total_tickets = await db.fetchval("SELECT COUNT(*) FROM tickets WHERE guild_id = $1", guild_id) or 0
-        open_tickets = await db.fetchval("SELECT COUNT(*) FROM tickets WHERE guild_id = $1 AND status = 'open'", guild_id) or 0
-        closed_tickets = await db.fetchval("SELECT COUNT(*) FROM tickets WHERE guild_id = $1 AND status = 'closed'", guild_id) or 0
-        claimed_tickets = await db.fetchval("SELECT COUNT(*) FROM tickets WHERE guild_id = $1 AND claimed_by IS NOT NULL AND status = 'open'", guild_id) or 0
+        counts = await db.fetchrow(
+            """SELECT COUNT(*) AS total,
+                      COUNT(*) FILTER (WHERE status = 'open') AS open,
+                      COUNT(*) FILTER (WHERE status = 'closed') AS closed,
+                      COUNT(*) FILTER (WHERE claimed_by IS NOT NULL AND status = 'open') AS claimed
+               FROM tickets WHERE guild_id = $1""",
+            guild_id
+        )
+        total_tickets = counts['total']
+        open_tickets = counts['open']
+        closed_tickets = counts['closed']
+        claimed_tickets = counts['claimed']
         unclaimed_tickets = open_tickets - claimed_tickets
         
         # Create the status embed
@@ -340,13 +402,17 @@ class Tickets(commands.Cog):
 
     @app_commands.command(name="add", description="Add a user to the current ticket")
     async def add_user(self, interaction: discord.Interaction, user: discord.Member):
-        if "ticket-" not in interaction.channel.name:
+        ticket = ticket_registry.get(interaction.channel.id)
+        if ticket is None:
             embed = discord.Embed(description="This command can only be used in ticket channels.", color=Config.COLOR_ERROR)
             return await interaction.response.send_message(embed=embed, ephemeral=True)
             
-        ticket_id = await db.fetchval("SELECT id FROM tickets WHERE channel_id = $1", interaction.channel.id)
-        if ticket_id:
-             await db.execute("INSERT INTO ticket_members (ticket_id, user_id) VALUES ($1, $2) ON CONFLICT DO NOTHING", ticket_id, user.id)
+        if user.id not in ticket.members:
+            await db.execute(
+                "INSERT INTO ticket_members (ticket_id, user_id) VALUES ($1, $2) ON CONFLICT DO NOTHING",
+                ticket.id, user.id
+            )
+            ticket.members.add(user.id)
              
         await interaction.channel.set_permissions(user, read_messages=True, send_messages=True, attach_files=True)
         embed = discord.Embed(description=f"Added {user.mention} to the ticket.", color=Config.COLOR_SUCCESS)
@@ -354,13 +420,14 @@ class Tickets(commands.Cog):
 
     @app_commands.command(name="remove", description="Remove a user from the current ticket")
     async def remove_user(self, interaction: discord.Interaction, user: discord.Member):
-        if "ticket-" not in interaction.channel.name:
+        ticket = ticket_registry.get(interaction.channel.id)
+        if ticket is None:
             embed = discord.Embed(description="This command can only be used in ticket channels.", color=Config.COLOR_ERROR)
             return await interaction.response.send_message(embed=embed, ephemeral=True)
         
-        ticket_id = await db.fetchval("SELECT id FROM tickets WHERE channel_id = $1", interaction.channel.id)
-        if ticket_id:
-             await db.execute("DELETE FROM ticket_members WHERE ticket_id = $1 AND user_id = $2", ticket_id, user.id)
+        if user.id in ticket.members:
+            await db.execute("DELETE FROM ticket_members WHERE ticket_id = $1 AND user_id = $2", ticket.id, user.id)
+            ticket.members.discard(user.id)
 
         await interaction.channel.set_permissions(user, overwrite=None)
         embed = discord.Embed(description=f"Removed {user.mention} from the ticket.", color=Config.COLOR_SUCCESS)
@@ -368,7 +435,7 @@ class Tickets(commands.Cog):
 
     @app_commands.command(name="rename", description="Rename the current ticket channel")
     async def rename_ticket(self, interaction: discord.Interaction, name: str):
-        if "ticket-" not in interaction.channel.name:
+        if ticket_registry.get(interaction.channel.id) is None:
             embed = discord.Embed(description="This command can only be used in ticket channels.", color=Config.COLOR_ERROR)
             return await interaction.response.send_message(embed=embed, ephemeral=True)
         old_name = interaction.channel.name
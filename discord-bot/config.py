@@ -10,8 +10,99 @@ class Config:
     DB_NAME = os.getenv("DB_NAME", "discordbot")
     DB_USER = os.getenv("DB_USER", "postgres")
     DB_PASSWORD = os.getenv("DB_PASSWORD", "password")
+    DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "10"))
+    DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    DB_ACQUIRE_TIMEOUT = float(os.getenv("DB_ACQUIRE_TIMEOUT", "10"))
+    DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+
+    # Gateway intents / cache profile: minimal, moderation or full
+    BOT_PROFILE = os.getenv("BOT_PROFILE", "full")
+
+    # Sync app commands on every start, even if the command tree hash is unchanged
+    FORCE_COMMAND_SYNC = os.getenv("FORCE_COMMAND_SYNC", "false").lower() == "true"
     
+    # Buffered server_logs writer
+    LOG_FLUSH_INTERVAL_MS = int(os.getenv("LOG_FLUSH_INTERVAL_MS", "500"))
+    LOG_FLUSH_ROWS = int(os.getenv("LOG_FLUSH_ROWS", "500"))
+    LOG_BUFFER_MAX = int(os.getenv("LOG_BUFFER_MAX", "10000"))
+
+    # server_logs partitions and retention (log_retention.py); 0 days keeps logs forever
+    LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "0"))
+    LOG_PARTITIONS_AHEAD = int(os.getenv("LOG_PARTITIONS_AHEAD", "2"))
+    LOG_PARTITION_ARCHIVE = os.getenv("LOG_PARTITION_ARCHIVE", "false").lower() == "true" # detach expired partitions instead of dropping
+    LOG_MAINTENANCE_INTERVAL_HOURS = float(os.getenv("LOG_MAINTENANCE_INTERVAL_HOURS", "6"))
+    LOG_RETENTION_BATCH = int(os.getenv("LOG_RETENTION_BATCH", "5000"))
+    LOG_RETENTION_BATCH_PAUSE_MS = int(os.getenv("LOG_RETENTION_BATCH_PAUSE_MS", "200"))
+
+    # Log channel delivery
+    LOG_COALESCE_MS = int(os.getenv("LOG_COALESCE_MS", "750"))
+    LOG_CHANNEL_RATE = int(os.getenv("LOG_CHANNEL_RATE", "5"))
+    LOG_CHANNEL_RATE_SECONDS = int(os.getenv("LOG_CHANNEL_RATE_SECONDS", "5"))
+    LOG_QUEUE_MAX = int(os.getenv("LOG_QUEUE_MAX", "200"))
+    LOG_OVERLOAD_POLICY = os.getenv("LOG_OVERLOAD_POLICY", "summarise") # summarise, drop_oldest or drop_newest
+    CHANNEL_NEGATIVE_TTL_SECONDS = int(os.getenv("CHANNEL_NEGATIVE_TTL_SECONDS", "600"))
+
+    # Audit log correlation (on_audit_log_entry_create)
+    AUDIT_LOG_TTL_SECONDS = int(os.getenv("AUDIT_LOG_TTL_SECONDS", "30"))
+    AUDIT_LOG_WAIT_SECONDS = float(os.getenv("AUDIT_LOG_WAIT_SECONDS", "2"))
+    # How long a leave waits for a kick entry before it's logged as a leave (upgraded if one turns up later)
+    AUDIT_LOG_KICK_WAIT_SECONDS = float(os.getenv("AUDIT_LOG_KICK_WAIT_SECONDS", "0.5"))
+
+    # Automod
+    AUTOMOD_REGEX_TIMEOUT_MS = int(os.getenv("AUTOMOD_REGEX_TIMEOUT_MS", "50"))
+    AUTOMOD_TIMEOUT_MINUTES = int(os.getenv("AUTOMOD_TIMEOUT_MINUTES", "10"))
+
+    # Spam / flood detection
+    SPAM_WINDOW_SECONDS = int(os.getenv("SPAM_WINDOW_SECONDS", "5"))
+    SPAM_MESSAGE_LIMIT = int(os.getenv("SPAM_MESSAGE_LIMIT", "6"))
+    SPAM_DUPLICATE_LIMIT = int(os.getenv("SPAM_DUPLICATE_LIMIT", "4"))
+    SPAM_MENTION_LIMIT = int(os.getenv("SPAM_MENTION_LIMIT", "8"))
+    SPAM_IDLE_SECONDS = int(os.getenv("SPAM_IDLE_SECONDS", "60"))
+    SPAM_TRACKER_MAX_USERS = int(os.getenv("SPAM_TRACKER_MAX_USERS", "50000"))
+
+    # Raid detection
+    RAID_WINDOW_SECONDS = int(os.getenv("RAID_WINDOW_SECONDS", "30"))
+    RAID_JOIN_THRESHOLD = int(os.getenv("RAID_JOIN_THRESHOLD", "10"))
+    RAID_MODE_SECONDS = int(os.getenv("RAID_MODE_SECONDS", "300"))
+    RAID_SUMMARY_SECONDS = int(os.getenv("RAID_SUMMARY_SECONDS", "30"))
+    RAID_MIN_ACCOUNT_AGE_HOURS = int(os.getenv("RAID_MIN_ACCOUNT_AGE_HOURS", "24"))
+    RAID_MAX_FLAGGED = int(os.getenv("RAID_MAX_FLAGGED", "1000"))
+    RAID_ACTION = os.getenv("RAID_ACTION", "none") # none, timeout or kick
+    RAID_ACTION_CONCURRENCY = int(os.getenv("RAID_ACTION_CONCURRENCY", "5"))
+
+    # Per-guild fair scheduling of event handler work (scheduler.py)
+    SCHEDULER_CONCURRENCY = int(os.getenv("SCHEDULER_CONCURRENCY", os.getenv("DB_POOL_MAX_SIZE", "10")))
+    SCHEDULER_GUILD_CONCURRENCY = int(os.getenv("SCHEDULER_GUILD_CONCURRENCY", "2"))
+    SCHEDULER_GUILD_QUEUE_MAX = int(os.getenv("SCHEDULER_GUILD_QUEUE_MAX", "500"))
+    # "guild_id:weight,..." (whole numbers, default 1), e.g. to give a large guild a bigger share
+    SCHEDULER_GUILD_WEIGHTS = {
+        int(guild): max(1, int(weight))
+        for guild, weight in (pair.split(":") for pair in os.getenv("SCHEDULER_GUILD_WEIGHTS", "").split(",") if pair.strip())
+    }
+
+    # Instrumentation (metrics.py)
+    SLOW_CALLBACK_MS = float(os.getenv("SLOW_CALLBACK_MS", "250"))
+    LOOP_LAG_WARN_MS = float(os.getenv("LOOP_LAG_WARN_MS", "100"))
+    METRICS_LOG_INTERVAL_SECONDS = int(os.getenv("METRICS_LOG_INTERVAL_SECONDS", "60"))
+    METRICS_HTTP_HOST = os.getenv("METRICS_HTTP_HOST", "127.0.0.1")
+    METRICS_HTTP_PORT = int(os.getenv("METRICS_HTTP_PORT", "0")) # 0 disables the endpoint
+
+    # Gateway recording for load tests (benchmarks/replay_gateway.py); off unless a path is set
+    GATEWAY_RECORD_PATH = os.getenv("GATEWAY_RECORD_PATH")
+    GATEWAY_RECORD_GUILD_IDS = [int(g) for g in os.getenv("GATEWAY_RECORD_GUILD_IDS", "").split(",") if g.strip()]
+    GATEWAY_RECORD_SCRUB = os.getenv("GATEWAY_RECORD_SCRUB", "true").lower() == "true"
+
+    # Ticket transcript file store (transcripts.py); the web panel must see the same directory
     TRANSCRIPT_PATH = os.getenv("TRANSCRIPT_PATH", "./transcripts")
+    TRANSCRIPT_COMPRESS_LEVEL = int(os.getenv("TRANSCRIPT_COMPRESS_LEVEL", "6"))
+    # Transcript files no ticket points at are removed by a periodic sweep, once untouched for the grace period
+    TRANSCRIPT_SWEEP_INTERVAL_HOURS = float(os.getenv("TRANSCRIPT_SWEEP_INTERVAL_HOURS", "24"))
+    TRANSCRIPT_SWEEP_GRACE_MINUTES = int(os.getenv("TRANSCRIPT_SWEEP_GRACE_MINUTES", "60"))
+    # Ticket message capture (ticket_capture.py), batched like the server_logs writer
+    TICKET_CAPTURE_FLUSH_MS = int(os.getenv("TICKET_CAPTURE_FLUSH_MS", "1000"))
+    TICKET_CAPTURE_FLUSH_ROWS = int(os.getenv("TICKET_CAPTURE_FLUSH_ROWS", "200"))
+    TICKET_CAPTURE_BUFFER_MAX = int(os.getenv("TICKET_CAPTURE_BUFFER_MAX", "5000"))
     
     # Colors
     COLOR_SUCCESS = int(os.getenv("COLOR_SUCCESS", "0x2ECC71"), 16)
@@ -1,45 +1,356 @@
+import asyncio
 import asyncpg
+import bisect
+import contextlib
+import hashlib
 import logging
+import time
 from config import Config
 
+class NotifyCache:
+    """
+    Per-guild cache kept current by Postgres NOTIFY. Subclasses set CHANNEL
+    and implement load(guild_id). A guild's entry is dropped when a NOTIFY
+    on CHANNEL names it (everything is dropped for a bare NOTIFY or when the
+    listener reconnects). Concurrent misses share one load, a load that
+    raced an invalidation isn't stored, and nothing is cached while the
+    manager isn't listening, since entries could then go stale unnoticed.
+    """
+    CHANNEL = None
+
+    def __init__(self, manager):
+        self.manager = manager
+        self._entries = {}
+        self._pending = {}
+        self._generation = 0
+        manager.listen(self.CHANNEL, self.invalidate)
+
+    async def load(self, guild_id):
+        raise NotImplementedError
+
+    async def get(self, guild_id):
+        if not self.manager.listening:
+            return await self.load(guild_id)
+
+        if guild_id in self._entries:
+            return self._entries[guild_id]
+
+        # Share a single in-flight load between concurrent misses
+        pending = self._pending.get(guild_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._load(guild_id))
+            self._pending[guild_id] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(guild_id, None))
+        return await asyncio.shield(pending)
+
+    async def _load(self, guild_id):
+        generation = self._generation
+        value = await self.load(guild_id)
+        # Skip storing if an invalidation arrived while we were loading
+        if generation == self._generation and self.manager.listening:
+            self._entries[guild_id] = value
+        return value
+
+    def invalidate(self, guild_id=None):
+        self._generation += 1
+        if guild_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(guild_id, None)
+
+class GuildConfigCache(NotifyCache):
+    """
+    Process-wide cache of guild_config rows.
+    Rows are loaded on first use and dropped when Postgres sends a
+    NOTIFY on CHANNEL (fired by the guild_config trigger in migrations/0004),
+    so writes from the bot and the web panel are both picked up.
+    get() returns the row, or None if the guild has none.
+    """
+    CHANNEL = "guild_config_changed"
+
+    def __init__(self, manager):
+        self.query = manager.query("guild_config.get", "SELECT * FROM guild_config WHERE guild_id = $1")
+        super().__init__(manager)
+
+    async def load(self, guild_id):
+        return await self.manager.fetchrow(self.query, guild_id)
+
+class Query:
+    """A named, registered SQL statement. Create with DatabaseManager.query()."""
+    __slots__ = ("name", "sql")
+
+    def __init__(self, name, sql):
+        self.name = name
+        self.sql = sql
+
+    def __repr__(self):
+        return f"<Query {self.name}>"
+
+class QueryStats:
+    # Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+    BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+    __slots__ = ("calls", "total_ms", "max_ms", "rows", "errors", "histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.errors = 0
+        self.histogram = [0] * (len(self.BUCKETS_MS) + 1)
+
+    def record(self, elapsed_ms, rows):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        self.histogram[bisect.bisect_left(self.BUCKETS_MS, elapsed_ms)] += 1
+
+    def percentile(self, fraction):
+        """Approximate latency percentile (upper bound of the bucket it falls in)."""
+        target = self.calls * fraction
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= target:
+                return self.BUCKETS_MS[i] if i < len(self.BUCKETS_MS) else self.max_ms
+        return 0.0
+
+def _raw_query_name(sql):
+    """Stats name for unregistered SQL: the normalised text, with a hash of it once it's shortened."""
+    text = " ".join(sql.split())
+    if len(text) <= 80:
+        return text
+    return f"{text[:72]}... [{hashlib.sha1(text.encode()).hexdigest()[:8]}]"
+
+def _row_count(result):
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, str):
+        # Command status such as "INSERT 0 5" or "UPDATE 3"
+        tail = result.rsplit(" ", 1)[-1]
+        return int(tail) if tail.isdigit() else 0
+    return 1
+
+class UnitOfWork:
+    """Statements issued through DatabaseManager.transaction(), sharing one connection."""
+
+    def __init__(self, manager, connection):
+        self.manager = manager
+        self.connection = connection
+
+    async def execute(self, query, *args):
+        return await self.manager._run_on(self.connection, "execute", query, args)
+
+    async def executemany(self, query, records):
+        return await self.manager._run_on(self.connection, "executemany", query, (records,))
+
+    async def fetch(self, query, *args):
+        return await self.manager._run_on(self.connection, "fetch", query, args)
+
+    async def fetchrow(self, query, *args):
+        return await self.manager._run_on(self.connection, "fetchrow", query, args)
+
+    async def fetchval(self, query, *args):
+        return await self.manager._run_on(self.connection, "fetchval", query, args)
+
 class DatabaseManager:
     def __init__(self):
         self.pool = None
+        self._listener = None
+        self._callbacks = {}
+        self.queries = {}
+        self.stats = {}
+        # Time spent waiting for a pooled connection, same histogram as queries
+        self.pool_wait = QueryStats()
+        self.guild_configs = GuildConfigCache(self)
+
+    def connect_kwargs(self):
+        return dict(
+            host=Config.DB_HOST,
+            port=Config.DB_PORT,
+            user=Config.DB_USER,
+            password=Config.DB_PASSWORD,
+            database=Config.DB_NAME
+        )
 
     async def connect(self):
         if not self.pool:
             try:
                 self.pool = await asyncpg.create_pool(
-                    host=Config.DB_HOST,
-                    port=Config.DB_PORT,
-                    user=Config.DB_USER,
-                    password=Config.DB_PASSWORD,
-                    database=Config.DB_NAME
+                    min_size=Config.DB_POOL_MIN_SIZE,
+                    max_size=Config.DB_POOL_MAX_SIZE,
+                    statement_cache_size=Config.DB_STATEMENT_CACHE_SIZE,
+                    **self.connect_kwargs()
                 )
                 logging.info("Connected to PostgreSQL database.")
             except Exception as e:
                 logging.error(f"Failed to connect to database: {e}")
                 raise e
+            if len(self.queries) > Config.DB_STATEMENT_CACHE_SIZE:
+                logging.warning(f"{len(self.queries)} registered queries exceed DB_STATEMENT_CACHE_SIZE ({Config.DB_STATEMENT_CACHE_SIZE}), some will be re-prepared")
+            await self._start_listener()
 
     async def close(self):
         if self.pool:
+            await self._stop_listener()
             await self.pool.close()
+            self.pool = None
             logging.info("Database connection closed.")
 
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        started = time.perf_counter()
+        connection = await self.pool.acquire(timeout=Config.DB_ACQUIRE_TIMEOUT)
+        self.pool_wait.record((time.perf_counter() - started) * 1000, 0)
+        try:
+            yield connection
+        finally:
+            await self.pool.release(connection)
+
+    def pool_usage(self):
+        """Return (connections in use, pool size)."""
+        if not self.pool:
+            return 0, 0
+        size = self.pool.get_size()
+        return size - self.pool.get_idle_size(), size
+
+    # Query registry
+
+    def query(self, name, sql):
+        """
+        Register a named statement. Registered statements are prepared once
+        per pooled connection (asyncpg keeps them in the connection's
+        statement cache, sized by DB_STATEMENT_CACHE_SIZE) and get their own
+        entry in self.stats. Raw SQL strings are still accepted everywhere
+        and are tracked under their text.
+        """
+        existing = self.queries.get(name)
+        if existing is not None and existing.sql != sql:
+            raise ValueError(f"Query '{name}' is already registered with different SQL")
+        self.queries[name] = existing or Query(name, sql)
+        return self.queries[name]
+
+    async def _run(self, method, query, args):
+        async with self.acquire() as connection:
+            return await self._run_on(connection, method, query, args)
+
+    async def _run_on(self, connection, method, query, args):
+        if isinstance(query, Query):
+            name, sql = query.name, query.sql
+        else:
+            name, sql = _raw_query_name(query), query
+
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = QueryStats()
+
+        started = time.perf_counter()
+        try:
+            result = await getattr(connection, method)(sql, *args)
+        except Exception:
+            stats.errors += 1
+            raise
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        stats.record(elapsed_ms, _row_count(result))
+        if elapsed_ms >= Config.DB_SLOW_QUERY_MS:
+            # metrics imports this module, so it's looked up here rather than at import time
+            from metrics import instrumentation
+            instrumentation.sample(f"slow_query:{name}", logging.WARNING, f"Slow query {name}: {elapsed_ms:.1f}ms")
+        return result
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        """
+        Run several statements on one pooled connection inside a single
+        transaction:
+
+            async with db.transaction() as tx:
+                row = await tx.fetchrow(...)
+                await tx.execute(...)
+        """
+        async with self.acquire() as connection:
+            async with connection.transaction():
+                yield UnitOfWork(self, connection)
+
     async def execute(self, query, *args):
-        async with self.pool.acquire() as connection:
-            return await connection.execute(query, *args)
+        return await self._run("execute", query, args)
+
+    async def executemany(self, query, records):
+        return await self._run("executemany", query, (records,))
 
     async def fetch(self, query, *args):
-        async with self.pool.acquire() as connection:
-            return await connection.fetch(query, *args)
+        return await self._run("fetch", query, args)
 
     async def fetchrow(self, query, *args):
-        async with self.pool.acquire() as connection:
-            return await connection.fetchrow(query, *args)
+        return await self._run("fetchrow", query, args)
 
     async def fetchval(self, query, *args):
-        async with self.pool.acquire() as connection:
-            return await connection.fetchval(query, *args)
+        return await self._run("fetchval", query, args)
+
+    async def get_guild_config(self, guild_id):
+        return await self.guild_configs.get(guild_id)
+
+    # Invalidation channel
+
+    @property
+    def listening(self):
+        return self._listener is not None
+
+    def listen(self, channel, callback):
+        """
+        Register callback(guild_id) for NOTIFYs on channel. The payload is
+        expected to be a guild id; callback(None) means "drop everything"
+        and is also sent whenever the listener connection is lost.
+        """
+        if channel not in self._callbacks and self._listener:
+            asyncio.ensure_future(self._listener.add_listener(channel, self._on_notify))
+        self._callbacks.setdefault(channel, []).append(callback)
+
+    async def _start_listener(self):
+        try:
+            self._listener = await asyncpg.connect(**self.connect_kwargs())
+            for channel in self._callbacks:
+                await self._listener.add_listener(channel, self._on_notify)
+            self._listener.add_termination_listener(self._on_terminate)
+        except Exception as e:
+            logging.error(f"Database listener unavailable, caches disabled: {e}")
+            self._listener = None
+
+    async def _stop_listener(self):
+        if self._listener:
+            listener, self._listener = self._listener, None
+            listener.remove_termination_listener(self._on_terminate)
+            await listener.close()
+        self._notify_all(None)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            guild_id = int(payload)
+        except (TypeError, ValueError):
+            guild_id = None
+        for callback in self._callbacks.get(channel, []):
+            callback(guild_id)
+
+    def _notify_all(self, guild_id):
+        for callbacks in self._callbacks.values():
+            for callback in callbacks:
+                callback(guild_id)
+
+    def _on_terminate(self, connection):
+        logging.warning("Database listener connection lost, reconnecting.")
+        self._listener = None
+        self._notify_all(None)
+        asyncio.get_event_loop().create_task(self._reconnect_listener())
+
+    async def _reconnect_listener(self):
+        delay = 1
+        while self.pool and self._listener is None:
+            await asyncio.sleep(delay)
+            await self._start_listener()
+            delay = min(delay * 2, 60)
 
 db = DatabaseManager()
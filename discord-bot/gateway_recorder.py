@@ -0,0 +1,128 @@
+import gzip
+import json
+import logging
+import os
+import re
+import time
+
+# Dispatch events captured for replay. READY only keeps the bot user and
+# application so the replay can impersonate the same account.
+RECORDED_EVENTS = {
+    "READY",
+    "GUILD_CREATE",
+    "MESSAGE_CREATE",
+    "MESSAGE_UPDATE",
+    "MESSAGE_DELETE",
+    "MESSAGE_DELETE_BULK",
+    "GUILD_MEMBER_ADD",
+    "GUILD_MEMBER_REMOVE",
+    "GUILD_MEMBER_UPDATE",
+    "VOICE_STATE_UPDATE",
+    "GUILD_AUDIT_LOG_ENTRY_CREATE",
+}
+
+FORMAT_VERSION = 1
+
+# Mentions, channel links and custom emoji survive scrubbing so the
+# moderation checks that count them still see the same shape of message
+_KEEP = re.compile(r"(<[@#:a-zA-Z!&]*\d+>|\s+)")
+
+def scrub_text(text):
+    """Replace every character except whitespace and mention tokens with 'x', keeping lengths."""
+    if not text:
+        return text
+    return "".join(part if _KEEP.fullmatch(part) else "x" * len(part) for part in _KEEP.split(text))
+
+def scrub_message(data):
+    if "content" in data:
+        data["content"] = scrub_text(data["content"])
+    if data.get("embeds"):
+        data["embeds"] = []
+    for attachment in data.get("attachments", ()):
+        attachment["filename"] = "attachment" + os.path.splitext(attachment.get("filename", ""))[1]
+        attachment["url"] = attachment["proxy_url"] = "https://cdn.invalid/attachment"
+    return data
+
+class GatewayRecorder:
+    """
+    Writes selected gateway dispatches to a gzip'd JSON-lines file, one
+    {"t": seconds_since_start, "e": event, "d": payload} object per line
+    after a header line. Fed from on_socket_raw_receive, which discord.py
+    only dispatches when the client is created with enable_debug_events.
+    """
+
+    def __init__(self):
+        self._file = None
+        self._started = None
+        self.guild_ids = set()
+        self.scrub = False
+        self.events = 0
+
+    @property
+    def recording(self):
+        return self._file is not None
+
+    def start(self, path, guild_ids=(), scrub=False):
+        self.guild_ids = set(guild_ids)
+        self.scrub = scrub
+        self._started = time.monotonic()
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._write({
+            "version": FORMAT_VERSION,
+            "recorded_at": time.time(),
+            "guild_ids": sorted(self.guild_ids),
+            "scrubbed": scrub
+        })
+        logging.info(f"Recording gateway events to {path}" + (" (content scrubbed)" if scrub else ""))
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+            logging.info(f"Gateway recording closed after {self.events} events.")
+
+    def record(self, raw):
+        if not self._file:
+            return
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        message = json.loads(raw)
+        event = message.get("t")
+        if message.get("op") != 0 or event not in RECORDED_EVENTS:
+            return
+
+        data = message["d"]
+        if event == "READY":
+            data = {"user": data["user"], "application": data.get("application")}
+        else:
+            guild_id = data.get("id") if event == "GUILD_CREATE" else data.get("guild_id")
+            if self.guild_ids and (guild_id is None or int(guild_id) not in self.guild_ids):
+                return
+            if event == "GUILD_CREATE":
+                # Presences are large and nothing we replay reads them
+                data.pop("presences", None)
+            elif self.scrub and event in ("MESSAGE_CREATE", "MESSAGE_UPDATE"):
+                data = scrub_message(data)
+
+        self._write({"t": round(time.monotonic() - self._started, 4), "e": event, "d": data})
+        self.events += 1
+
+    def _write(self, obj):
+        self._file.write(json.dumps(obj, separators=(",", ":")) + "\n")
+
+def read_recording(path):
+    """Return (header, iterator of (t, event, data)) for a recording file."""
+    f = gzip.open(path, "rt", encoding="utf-8")
+    header = json.loads(f.readline())
+    if header.get("version") != FORMAT_VERSION:
+        f.close()
+        raise ValueError(f"Unsupported recording version {header.get('version')}")
+
+    def events():
+        with f:
+            for line in f:
+                entry = json.loads(line)
+                yield entry["t"], entry["e"], entry["d"]
+    return header, events()
+
+gateway_recorder = GatewayRecorder()
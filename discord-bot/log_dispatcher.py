@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+import discord
+from config import Config
+
+# Discord limits for a single message
+MAX_EMBEDS = 10
+MAX_EMBED_CHARS = 6000
+
+class _ChannelQueue:
+    __slots__ = ("channel", "embeds", "dropped", "sent_at", "task")
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.embeds = deque()
+        self.dropped = Counter()
+        # Send times inside the current rate window
+        self.sent_at = deque()
+        self.task = None
+
+class LogDispatcher:
+    """
+    Per-channel outbound queue for log embeds.
+    Embeds sent to the same channel within LOG_COALESCE_MS are packed into
+    one message (up to 10 embeds / 6000 characters). Each channel is held
+    to LOG_CHANNEL_RATE messages per LOG_CHANNEL_RATE_SECONDS, and once
+    LOG_QUEUE_MAX embeds are waiting LOG_OVERLOAD_POLICY decides what is
+    dropped: "drop_newest", "drop_oldest" or "summarise" (drop the oldest
+    and report how many of each kind were lost).
+    """
+
+    def __init__(self):
+        self._queues = {}
+        self.messages_sent = 0
+        self.embeds_sent = 0
+
+    @property
+    def pending(self):
+        """Embeds waiting to be sent, across all channels."""
+        return sum(len(q.embeds) for q in self._queues.values())
+
+    def send(self, channel, embed):
+        queue = self._queues.get(channel.id)
+        if queue is None:
+            queue = self._queues[channel.id] = _ChannelQueue(channel)
+
+        if len(queue.embeds) >= Config.LOG_QUEUE_MAX:
+            if Config.LOG_OVERLOAD_POLICY == "drop_newest":
+                queue.dropped[embed.title or "Log Event"] += 1
+                return
+            old = queue.embeds.popleft()
+            queue.dropped[old.title or "Log Event"] += 1
+        queue.embeds.append(embed)
+
+        if queue.task is None or queue.task.done():
+            queue.task = asyncio.create_task(self._run(queue))
+
+    async def close(self):
+        """Send everything still queued, then stop."""
+        tasks = [q.task for q in self._queues.values() if q.task and not q.task.done()]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, queue):
+        try:
+            while queue.embeds:
+                # Give related events a moment to arrive so they share a message
+                await asyncio.sleep(Config.LOG_COALESCE_MS / 1000)
+                await self._wait_for_slot(queue)
+                batch = self._take_batch(queue)
+                if batch:
+                    await self._deliver(queue.channel, batch)
+        finally:
+            if not queue.embeds and not queue.dropped:
+                self._queues.pop(queue.channel.id, None)
+
+    async def _wait_for_slot(self, queue):
+        window = Config.LOG_CHANNEL_RATE_SECONDS
+        while True:
+            now = time.monotonic()
+            while queue.sent_at and now - queue.sent_at[0] >= window:
+                queue.sent_at.popleft()
+            if len(queue.sent_at) < Config.LOG_CHANNEL_RATE:
+                queue.sent_at.append(now)
+                return
+            await asyncio.sleep(window - (now - queue.sent_at[0]))
+
+    def _take_batch(self, queue):
+        batch = []
+        chars = 0
+        if queue.dropped and Config.LOG_OVERLOAD_POLICY == "summarise":
+            summary = self._summary_embed(queue.dropped)
+            queue.dropped.clear()
+            batch.append(summary)
+            chars += len(summary)
+        elif queue.dropped:
+            logging.warning(f"Log channel {queue.channel.id} overloaded, dropped {sum(queue.dropped.values())} embed(s)")
+            queue.dropped.clear()
+
+        while queue.embeds and len(batch) < MAX_EMBEDS:
+            size = len(queue.embeds[0])
+            if batch and chars + size > MAX_EMBED_CHARS:
+                break
+            batch.append(queue.embeds.popleft())
+            chars += size
+        return batch
+
+    def _summary_embed(self, dropped):
+        lines = [f"{title}: `{count}`" for title, count in dropped.most_common(15)]
+        return discord.Embed(
+            title="Log Events Skipped",
+            description=f"This channel is receiving more events than can be delivered. Skipped `{sum(dropped.values())}` event(s):\n" + "\n".join(lines),
+            color=Config.COLOR_ERROR
+        )
+
+    async def _deliver(self, channel, batch):
+        try:
+            await channel.send(embeds=batch)
+            self.messages_sent += 1
+            self.embeds_sent += len(batch)
+        except discord.HTTPException as e:
+            logging.error(f"Failed to deliver {len(batch)} log embed(s) to {channel.id}: {e}")
+
+log_dispatcher = LogDispatcher()
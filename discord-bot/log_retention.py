@@ -0,0 +1,151 @@
+import asyncio
+import datetime
+import logging
+import re
+from database import db, UnitOfWork
+from config import Config
+
+# Arbitrary constant so only one bot process runs maintenance at a time
+MAINTENANCE_LOCK_ID = 7_310_182_615
+
+_PARTITION_NAME = re.compile(r"^server_logs_p(\d{4})(\d{2})$")
+
+LIST_PARTITIONS = db.query(
+    "server_logs.partitions",
+    """SELECT c.relname FROM pg_inherits i
+       JOIN pg_class c ON c.oid = i.inhrelid
+       WHERE i.inhparent = 'server_logs'::regclass"""
+)
+RETENTION_OVERRIDES = db.query(
+    "guild_config.log_retention",
+    "SELECT guild_id, log_retention_days FROM guild_config WHERE log_retention_days IS NOT NULL"
+)
+DELETE_GUILD_BATCH = db.query(
+    "server_logs.delete_guild_batch",
+    """DELETE FROM server_logs WHERE (created_at, id) IN (
+           SELECT created_at, id FROM server_logs
+           WHERE guild_id = $1 AND created_at < $2
+           LIMIT $3
+       )"""
+)
+DELETE_DEFAULT_BATCH = db.query(
+    "server_logs.delete_default_batch",
+    """DELETE FROM server_logs WHERE (created_at, id) IN (
+           SELECT created_at, id FROM server_logs
+           WHERE created_at < $1 AND guild_id <> ALL($2::BIGINT[])
+           LIMIT $3
+       )"""
+)
+
+def add_months(month, count):
+    total = month.year * 12 + month.month - 1 + count
+    return datetime.date(total // 12, total % 12 + 1, 1)
+
+class ServerLogMaintenance:
+    """
+    Keeps the monthly server_logs partitions (migrations/0006) in shape:
+    creates partitions LOG_PARTITIONS_AHEAD months ahead, and applies
+    retention. Retention is LOG_RETENTION_DAYS unless a guild sets
+    guild_config.log_retention_days (0 = keep forever either way).
+    A partition is detached and dropped (or only detached, with
+    LOG_PARTITION_ARCHIVE) once it's older than the longest retention in
+    effect; guilds with a shorter retention have their older rows deleted
+    in small batches so vacuum never has much to do at once.
+    """
+
+    def __init__(self):
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.running:
+            self._task.cancel()
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logging.error(f"server_logs maintenance failed: {e}")
+            await asyncio.sleep(Config.LOG_MAINTENANCE_INTERVAL_HOURS * 3600)
+
+    async def run_once(self):
+        async with db.acquire() as connection:
+            # Plain statements on one connection (the advisory lock is per session)
+            session = UnitOfWork(db, connection)
+            if not await session.fetchval("SELECT pg_try_advisory_lock($1)", MAINTENANCE_LOCK_ID):
+                logging.info("server_logs maintenance already running in another process, skipping.")
+                return
+            try:
+                # Never raises, so a month that can't be partitioned doesn't hold up retention
+                await self.create_partitions(session)
+                await self.apply_retention(session)
+            finally:
+                await session.execute("SELECT pg_advisory_unlock($1)", MAINTENANCE_LOCK_ID)
+
+    async def create_partitions(self, session):
+        this_month = datetime.date.today().replace(day=1)
+        for offset in range(Config.LOG_PARTITIONS_AHEAD + 1):
+            month = add_months(this_month, offset)
+            try:
+                await session.execute("SELECT create_server_logs_partition($1)", month)
+            except Exception as e:
+                # Rows for the month stay in server_logs_default until this succeeds
+                logging.error(f"Could not create the server_logs partition for {month:%Y-%m}: {e}")
+
+    async def apply_retention(self, session):
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        overrides = {r['guild_id']: r['log_retention_days'] for r in await session.fetch(RETENTION_OVERRIDES)}
+        retentions = [Config.LOG_RETENTION_DAYS] + list(overrides.values())
+        # Rows newer than the longest retention in effect are kept for someone
+        horizon = None if 0 in retentions else max(retentions)
+
+        if horizon is not None:
+            await self.drop_partitions(session, now - datetime.timedelta(days=horizon))
+
+        for guild_id, days in overrides.items():
+            if days and (horizon is None or days < horizon):
+                await self.delete_batches(session, DELETE_GUILD_BATCH, guild_id, now - datetime.timedelta(days=days))
+        default = Config.LOG_RETENTION_DAYS
+        if default and (horizon is None or default < horizon):
+            await self.delete_batches(session, DELETE_DEFAULT_BATCH, now - datetime.timedelta(days=default), list(overrides))
+
+    async def drop_partitions(self, session, cutoff):
+        """Remove monthly partitions whose whole range is older than cutoff."""
+        for row in await session.fetch(LIST_PARTITIONS):
+            match = _PARTITION_NAME.match(row['relname'])
+            if not match:
+                continue
+            month = datetime.date(int(match.group(1)), int(match.group(2)), 1)
+            if datetime.datetime.combine(add_months(month, 1), datetime.time()) > cutoff:
+                continue
+            await session.execute(f'ALTER TABLE server_logs DETACH PARTITION "{row["relname"]}"')
+            if Config.LOG_PARTITION_ARCHIVE:
+                logging.info(f"Detached server_logs partition {row['relname']} (kept for archiving)")
+            else:
+                await session.execute(f'DROP TABLE "{row["relname"]}"')
+                logging.info(f"Dropped server_logs partition {row['relname']}")
+
+    async def delete_batches(self, session, query, *args):
+        deleted = 0
+        while True:
+            status = await session.execute(query, *args, Config.LOG_RETENTION_BATCH)
+            count = int(status.rsplit(" ", 1)[-1])
+            deleted += count
+            if count < Config.LOG_RETENTION_BATCH:
+                break
+            # Let autovacuum and the live workload keep up between batches
+            await asyncio.sleep(Config.LOG_RETENTION_BATCH_PAUSE_MS / 1000)
+        if deleted:
+            logging.info(f"Deleted {deleted} expired server log(s) ({query.name})")
+        return deleted
+
+server_log_maintenance = ServerLogMaintenance()
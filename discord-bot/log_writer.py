@@ -0,0 +1,129 @@
+import asyncio
+import datetime
+import logging
+from database import db
+from config import Config
+
+INSERT_LOG = db.query(
+    "server_logs.insert",
+    "INSERT INTO server_logs (guild_id, user_id, action_type, target_id, details, created_at) VALUES ($1, $2, $3, $4, $5, $6)"
+)
+
+async def run_batches(queue, write, interval_ms, max_rows):
+    """
+    Batching loop of the write-behind writers (server_logs, ticket_messages).
+    Takes items off queue and calls write(batch) every interval_ms or
+    max_rows items, whichever comes first. None stops the loop after
+    writing everything queued. An asyncio future in the queue is a flush
+    marker: it isn't written, and is resolved once the batch holding it is.
+    """
+    loop = asyncio.get_running_loop()
+    interval = interval_ms / 1000
+    closing = False
+    while not closing:
+        item = await queue.get()
+        if item is None:
+            break
+        batch = [item]
+        deadline = loop.time() + interval
+        while len(batch) < max_rows:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                closing = True
+                break
+            batch.append(item)
+        await _write_batch(write, batch)
+
+    # Drain anything queued behind the close marker
+    remaining = []
+    while not queue.empty():
+        item = queue.get_nowait()
+        if item is not None:
+            remaining.append(item)
+    await _write_batch(write, remaining)
+
+async def _write_batch(write, batch):
+    markers = [item for item in batch if isinstance(item, asyncio.Future)]
+    items = [item for item in batch if not isinstance(item, asyncio.Future)]
+    if items:
+        await write(items)
+    for marker in markers:
+        if not marker.done():
+            marker.set_result(None)
+
+class ServerLogWriter:
+    """
+    Write-behind sink for server_logs.
+    Events are queued in memory and written with COPY every
+    LOG_FLUSH_INTERVAL_MS or LOG_FLUSH_ROWS rows, whichever comes first.
+    When LOG_BUFFER_MAX events are waiting, add() blocks until the
+    writer catches up. A failed COPY is retried once, then the batch is
+    inserted row by row so a bad row or a brief outage loses only the
+    rows that still can't be written.
+    """
+    COLUMNS = ("guild_id", "user_id", "action_type", "target_id", "details", "created_at")
+
+    def __init__(self):
+        self._queue = None
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self):
+        """Events queued but not yet written."""
+        return self._queue.qsize() if self.running else 0
+
+    def start(self):
+        if not self.running:
+            self._queue = asyncio.Queue(maxsize=Config.LOG_BUFFER_MAX)
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Flush everything still buffered and stop the writer."""
+        if self.running:
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+
+    async def add(self, guild_id, user_id, action_type, target_id=None, details=None):
+        created_at = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        record = (guild_id, user_id, action_type, target_id, details, created_at)
+        if not self.running:
+            # Writer not started (e.g. standalone scripts), insert directly
+            return await self._write([record])
+        await self._queue.put(record)
+
+    async def _run(self):
+        await run_batches(self._queue, self._write, Config.LOG_FLUSH_INTERVAL_MS, Config.LOG_FLUSH_ROWS)
+
+    async def _write(self, records):
+        for attempt in range(2):
+            try:
+                async with db.acquire() as connection:
+                    await connection.copy_records_to_table("server_logs", records=records, columns=self.COLUMNS)
+                return
+            except Exception as e:
+                logging.warning(f"Writing {len(records)} server log(s) with COPY failed (attempt {attempt + 1}): {e}")
+                if attempt == 0:
+                    await asyncio.sleep(Config.LOG_FLUSH_INTERVAL_MS / 1000)
+
+        failed = 0
+        for record in records:
+            try:
+                await db.execute(INSERT_LOG, *record)
+            except Exception as e:
+                failed += 1
+                error = e
+        if failed:
+            logging.error(f"Failed to write {failed} of {len(records)} server log(s): {error}")
+
+log_writer = ServerLogWriter()
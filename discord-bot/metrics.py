@@ -0,0 +1,239 @@
+import asyncio
+import json
+import logging
+import time
+from collections import Counter, deque
+from aiohttp import web
+from config import Config
+from database import db, QueryStats
+from channels import channel_resolver
+from log_writer import log_writer
+from log_dispatcher import log_dispatcher
+from ticket_capture import ticket_messages
+
+class Instrumentation:
+    """
+    Timings for every cog listener and app command, plus named counters for
+    notable conditions. Callbacks slower than SLOW_CALLBACK_MS are kept in a
+    short history and logged; all log lines go through sample() so a hot
+    path can't flood the log: the first occurrence of each key is logged,
+    then at most one per METRICS_LOG_INTERVAL_SECONDS with a count of the
+    ones skipped in between.
+    """
+    SLOW_HISTORY = 50
+
+    def __init__(self):
+        # (kind, cog, name) -> QueryStats, kind is "event" or "command"
+        self.callbacks = {}
+        self.slow = deque(maxlen=self.SLOW_HISTORY)
+        self.counters = Counter()
+        self._logged_at = {}
+        self._skipped = Counter()
+
+    def record(self, kind, cog, name, guild_id, elapsed_ms):
+        key = (kind, cog, name)
+        stats = self.callbacks.get(key)
+        if stats is None:
+            stats = self.callbacks[key] = QueryStats()
+        stats.record(elapsed_ms, 0)
+
+        if elapsed_ms >= Config.SLOW_CALLBACK_MS:
+            self.slow.append({
+                "at": time.time(),
+                "kind": kind,
+                "cog": cog,
+                "name": name,
+                "guild_id": guild_id,
+                "ms": round(elapsed_ms, 1)
+            })
+            self.sample(
+                f"slow:{cog}.{name}", logging.WARNING,
+                f"Slow {kind} {cog}.{name} took {elapsed_ms:.0f}ms (guild {guild_id})"
+            )
+
+    def count(self, name, message=None, level=logging.DEBUG):
+        """Increment counter name and, if given, log message (sampled)."""
+        self.counters[name] += 1
+        if message:
+            self.sample(name, level, message)
+
+    def sample(self, key, level, message):
+        now = time.monotonic()
+        last = self._logged_at.get(key)
+        if last is not None and now - last < Config.METRICS_LOG_INTERVAL_SECONDS:
+            self._skipped[key] += 1
+            return
+        self._logged_at[key] = now
+        skipped = self._skipped.pop(key, 0)
+        logging.log(level, message + (f" ({skipped} similar since last report)" if skipped else ""))
+
+    def top(self, limit=10, by="p99"):
+        """[(kind, cog, name, stats)] sorted by p99, max or total time."""
+        keys = {
+            "p99": lambda item: item[1].percentile(0.99),
+            "max": lambda item: item[1].max_ms,
+            "total": lambda item: item[1].total_ms,
+        }
+        ranked = sorted(self.callbacks.items(), key=keys[by], reverse=True)[:limit]
+        return [(kind, cog, name, stats) for (kind, cog, name), stats in ranked]
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag by sleeping for INTERVAL and recording how late
+    the wakeup was. Anything that blocks the loop (slow sync code, huge
+    batches of callbacks) shows up here directly. self.stats is a window
+    that callers can reset(); self.recent always holds the last minute.
+    """
+    INTERVAL = 0.05
+    RECENT_SAMPLES = 1200
+
+    def __init__(self):
+        self.stats = QueryStats()
+        self.recent = deque(maxlen=self.RECENT_SAMPLES)
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.running:
+            self._task.cancel()
+        self._task = None
+
+    def reset(self):
+        """Start a new measurement window and return the previous one."""
+        stats, self.stats = self.stats, QueryStats()
+        return stats
+
+    def rolling(self):
+        """p50/p99/max lag in ms over the last RECENT_SAMPLES wakeups."""
+        values = sorted(self.recent)
+        if not values:
+            return {"p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        return {
+            "p50_ms": round(values[len(values) // 2], 2),
+            "p99_ms": round(values[min(len(values) - 1, int(len(values) * 0.99))], 2),
+            "max_ms": round(values[-1], 2)
+        }
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.INTERVAL)
+            lag_ms = max((time.perf_counter() - started - self.INTERVAL) * 1000, 0.0)
+            self.stats.record(lag_ms, 0)
+            self.recent.append(lag_ms)
+            if lag_ms >= Config.LOOP_LAG_WARN_MS:
+                instrumentation.count("loop_lag", f"Event loop blocked for {lag_ms:.0f}ms", logging.WARNING)
+
+def snapshot():
+    """Everything the metrics endpoint and /diagnostics report, as plain data."""
+    def stats_dict(stats):
+        return {
+            "calls": stats.calls,
+            "errors": stats.errors,
+            "mean_ms": round(stats.total_ms / stats.calls, 3) if stats.calls else 0.0,
+            "p99_ms": stats.percentile(0.99),
+            "max_ms": round(stats.max_ms, 2),
+        }
+
+    in_use, size = db.pool_usage()
+    # scheduler imports this module, so it can't be imported at the top
+    from scheduler import guild_scheduler
+    return {
+        "loop_lag": loop_lag.rolling(),
+        "tasks": len(asyncio.all_tasks()),
+        "callbacks": [
+            dict(kind=kind, cog=cog, name=name, **stats_dict(stats))
+            for kind, cog, name, stats in instrumentation.top(limit=len(instrumentation.callbacks))
+        ],
+        "slow_callbacks": list(instrumentation.slow),
+        "counters": dict(instrumentation.counters),
+        "queries": {name: stats_dict(stats) for name, stats in db.stats.items()},
+        "pool": {"in_use": in_use, "size": size, "wait": stats_dict(db.pool_wait)},
+        "queues": {"log_writer": log_writer.pending, "log_dispatcher": log_dispatcher.pending, "ticket_messages": ticket_messages.pending},
+        # How often configured channels come from the cache, the negative cache or a REST fetch
+        "channel_resolver": {"hits": channel_resolver.hits, "misses": channel_resolver.misses, "fetches": channel_resolver.fetches},
+        "guilds": guild_scheduler.stats(),
+    }
+
+def prometheus_text():
+    """snapshot() in the Prometheus text exposition format."""
+    def histogram(metric, labels, stats):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(QueryStats.BUCKETS_MS + ("+Inf",), stats.histogram):
+            cumulative += count
+            le = bound if bound == "+Inf" else bound / 1000
+            lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f"{metric}_sum{{{labels}}} {stats.total_ms / 1000}")
+        lines.append(f"{metric}_count{{{labels}}} {stats.calls}")
+        return lines
+
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+    data = snapshot()
+    lines = ["# TYPE bot_callback_seconds histogram"]
+    for (kind, cog, name), stats in instrumentation.callbacks.items():
+        lines += histogram("bot_callback_seconds", f'kind="{kind}",cog="{escape(cog)}",name="{escape(name)}"', stats)
+    lines.append("# TYPE bot_query_seconds histogram")
+    for name, stats in db.stats.items():
+        lines += histogram("bot_query_seconds", f'query="{escape(name)}"', stats)
+    lines.append("# TYPE bot_pool_wait_seconds histogram")
+    lines += histogram("bot_pool_wait_seconds", 'pool="main"', db.pool_wait)
+    lines.append("# TYPE bot_loop_lag_seconds gauge")
+    for key in ("p50", "p99", "max"):
+        lines.append(f'bot_loop_lag_seconds{{quantile="{key}"}} {data["loop_lag"][key + "_ms"] / 1000}')
+    lines.append("# TYPE bot_events_total counter")
+    for name, value in data["counters"].items():
+        lines.append(f'bot_events_total{{name="{escape(name)}"}} {value}')
+    lines.append("# TYPE bot_queue_depth gauge")
+    for name, value in data["queues"].items():
+        lines.append(f'bot_queue_depth{{queue="{name}"}} {value}')
+    lines.append("# TYPE bot_channel_resolver_total counter")
+    for result, value in data["channel_resolver"].items():
+        lines.append(f'bot_channel_resolver_total{{result="{result}"}} {value}')
+    for metric, key in (("bot_guild_queue_depth", "queued"), ("bot_guild_dropped_total", "dropped"), ("bot_guild_throttled_total", "throttled")):
+        lines.append(f"# TYPE {metric} {'gauge' if key == 'queued' else 'counter'}")
+        for row in data["guilds"]:
+            lines.append(f'{metric}{{guild="{row["guild_id"]}"}} {row[key]}')
+    lines.append(f"bot_pool_in_use {data['pool']['in_use']}")
+    lines.append(f"bot_pool_size {data['pool']['size']}")
+    lines.append(f"bot_tasks {data['tasks']}")
+    return "\n".join(lines) + "\n"
+
+class MetricsServer:
+    """Local HTTP endpoint: /metrics (Prometheus text) and /metrics.json."""
+
+    def __init__(self):
+        self._runner = None
+
+    async def start(self, host, port):
+        app = web.Application()
+        app.router.add_get("/metrics", self._prometheus)
+        app.router.add_get("/metrics.json", self._json)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logging.info(f"Metrics endpoint listening on http://{host}:{port}/metrics")
+
+    async def close(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _prometheus(self, request):
+        return web.Response(text=prometheus_text(), content_type="text/plain")
+
+    async def _json(self, request):
+        return web.json_response(snapshot(), dumps=lambda obj: json.dumps(obj, default=str))
+
+instrumentation = Instrumentation()
+loop_lag = LoopLagMonitor()
+metrics_server = MetricsServer()
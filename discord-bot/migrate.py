@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import os
+import re
+import asyncpg
+from database import db
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# Arbitrary constant shared by every process that runs migrations (bot and panel)
+MIGRATION_LOCK_ID = 7_310_182_614
+
+def discover():
+    """Return [(version, name, path)] for migrations/NNNN_name.sql, ordered by version."""
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = re.match(r"^(\d+)_(.+)\.sql$", filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    migrations.sort()
+    versions = [m[0] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError("Duplicate migration version numbers in migrations/")
+    return migrations
+
+async def current_version(connection):
+    try:
+        return await connection.fetchval("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    except asyncpg.UndefinedTableError:
+        return 0
+
+async def run_migrations():
+    """
+    Bring the database up to the latest migration. When it's already current
+    this is a single version query; otherwise the pending files are applied
+    in order, each in its own transaction, under an advisory lock so several
+    processes can start at once.
+    """
+    migrations = discover()
+    latest = migrations[-1][0] if migrations else 0
+
+    async with db.acquire() as connection:
+        version = await current_version(connection)
+        if version >= latest:
+            logging.info(f"Database schema is current (version {version}).")
+            return version
+
+        await connection.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+        try:
+            await connection.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            # Another process may have applied some while we waited for the lock
+            applied = {r['version'] for r in await connection.fetch("SELECT version FROM schema_migrations")}
+            for number, name, path in migrations:
+                if number in applied:
+                    continue
+                with open(path, 'r') as f:
+                    sql = f.read()
+                async with connection.transaction():
+                    await connection.execute(sql)
+                    await connection.execute("INSERT INTO schema_migrations (version, name) VALUES ($1, $2)", number, name)
+                logging.info(f"Applied migration {number:04d}_{name}")
+        finally:
+            await connection.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+
+        return await current_version(connection)
+
+async def main():
+    logging.basicConfig(level=logging.INFO)
+    await db.connect()
+    try:
+        version = await run_migrations()
+        print(f"Database at schema version {version}.")
+    finally:
+        await db.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,2 @@
+-- Invite link automod toggle (previously migrate_automod.py)
+ALTER TABLE guild_config ADD COLUMN IF NOT EXISTS automod_invite_links BOOLEAN DEFAULT FALSE;
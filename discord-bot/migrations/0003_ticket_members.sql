@@ -0,0 +1,6 @@
+-- Members added to a ticket with /add, restored when a ticket is reopened
+CREATE TABLE IF NOT EXISTS ticket_members (
+    ticket_id INTEGER NOT NULL REFERENCES tickets(id) ON DELETE CASCADE,
+    user_id BIGINT NOT NULL,
+    PRIMARY KEY (ticket_id, user_id)
+);
@@ -0,0 +1,51 @@
+-- Change notifications used by the bot's in-memory caches (guild config, word filters, automod rules)
+-- Notify bot processes when a guild's configuration changes so cached rows are dropped
+CREATE OR REPLACE FUNCTION notify_guild_config_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('guild_config_changed', OLD.guild_id::text);
+    ELSE
+        PERFORM pg_notify('guild_config_changed', NEW.guild_id::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS guild_config_changed ON guild_config;
+CREATE TRIGGER guild_config_changed
+    AFTER INSERT OR UPDATE OR DELETE ON guild_config
+    FOR EACH ROW EXECUTE FUNCTION notify_guild_config_changed();
+
+-- Notify bot processes when a guild's word filters change so compiled matchers are rebuilt
+CREATE OR REPLACE FUNCTION notify_word_filters_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('word_filters_changed', OLD.guild_id::text);
+    ELSE
+        PERFORM pg_notify('word_filters_changed', NEW.guild_id::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS word_filters_changed ON word_filters;
+CREATE TRIGGER word_filters_changed
+    AFTER INSERT OR UPDATE OR DELETE ON word_filters
+    FOR EACH ROW EXECUTE FUNCTION notify_word_filters_changed();
+
+-- Notify bot processes when a guild's automod rules change so compiled rule sets are rebuilt
+CREATE OR REPLACE FUNCTION notify_automod_rules_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('automod_rules_changed', OLD.guild_id::text);
+    ELSE
+        PERFORM pg_notify('automod_rules_changed', NEW.guild_id::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS automod_rules_changed ON automod_rules;
+CREATE TRIGGER automod_rules_changed
+    AFTER INSERT OR UPDATE OR DELETE ON automod_rules
+    FOR EACH ROW EXECUTE FUNCTION notify_automod_rules_changed();
@@ -0,0 +1,6 @@
+-- Small key/value store for bot process state (e.g. hash of the last synced command tree)
+CREATE TABLE IF NOT EXISTS bot_state (
+    key TEXT PRIMARY KEY,
+    value TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,62 @@
+-- Monthly range partitioning of server_logs on created_at, with a (guild_id, created_at) index
+-- on every partition. Future partitions and retention are handled by log_retention.py.
+
+-- Creates the partition holding the month of the given date, if missing; returns its name
+CREATE OR REPLACE FUNCTION create_server_logs_partition(month DATE) RETURNS TEXT AS $$
+DECLARE
+    start_date DATE := date_trunc('month', month)::date;
+    partition_name TEXT := 'server_logs_p' || to_char(start_date, 'YYYYMM');
+BEGIN
+    IF to_regclass(partition_name) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF server_logs FOR VALUES FROM (%L) TO (%L)',
+            partition_name, start_date, (start_date + INTERVAL '1 month')::date
+        );
+    END IF;
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE server_logs RENAME TO server_logs_unpartitioned;
+ALTER TABLE server_logs_unpartitioned RENAME CONSTRAINT server_logs_pkey TO server_logs_unpartitioned_pkey;
+
+-- Keep the existing id sequence so ids stay unique across the move
+ALTER SEQUENCE server_logs_id_seq AS BIGINT;
+ALTER SEQUENCE server_logs_id_seq OWNED BY NONE;
+
+CREATE TABLE server_logs (
+    id BIGINT NOT NULL DEFAULT nextval('server_logs_id_seq'),
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT,
+    action_type VARCHAR(50) NOT NULL, -- message_delete, member_join, etc.
+    target_id BIGINT,
+    details TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    -- The partition key has to be part of the primary key
+    PRIMARY KEY (created_at, id)
+) PARTITION BY RANGE (created_at);
+
+ALTER SEQUENCE server_logs_id_seq OWNED BY server_logs.id;
+
+-- Created on every partition, present and future
+CREATE INDEX server_logs_guild_created_idx ON server_logs (guild_id, created_at DESC, id DESC);
+
+-- Catches rows outside any monthly partition so writes never fail
+CREATE TABLE server_logs_default PARTITION OF server_logs DEFAULT;
+
+-- Partitions from the oldest existing row through two months ahead
+SELECT create_server_logs_partition(month::date)
+FROM generate_series(
+    date_trunc('month', COALESCE((SELECT MIN(created_at) FROM server_logs_unpartitioned), CURRENT_TIMESTAMP)),
+    date_trunc('month', CURRENT_TIMESTAMP) + INTERVAL '2 months',
+    INTERVAL '1 month'
+) AS month;
+
+INSERT INTO server_logs (id, guild_id, user_id, action_type, target_id, details, created_at)
+SELECT id, guild_id, user_id, action_type, target_id, details, COALESCE(created_at, CURRENT_TIMESTAMP)
+FROM server_logs_unpartitioned;
+
+DROP TABLE server_logs_unpartitioned;
+
+-- Per-guild log retention in days; NULL uses LOG_RETENTION_DAYS
+ALTER TABLE guild_config ADD COLUMN IF NOT EXISTS log_retention_days INTEGER;
@@ -0,0 +1,4 @@
+-- Indexes for the /logs browser's action and user filters; both end in (created_at, id)
+-- so each filter can be paged by keyset straight off the index
+CREATE INDEX IF NOT EXISTS server_logs_guild_action_created_idx ON server_logs (guild_id, action_type, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS server_logs_guild_user_created_idx ON server_logs (guild_id, user_id, created_at DESC, id DESC);
@@ -0,0 +1,3 @@
+-- Transcripts are stored gzip-compressed (transcripts.py); transcript_text is only kept
+-- for transcripts saved before this
+ALTER TABLE tickets ADD COLUMN IF NOT EXISTS transcript_gz BYTEA;
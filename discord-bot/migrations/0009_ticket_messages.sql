@@ -0,0 +1,16 @@
+-- Messages of ticket channels, captured as they arrive (ticket_capture.py) so transcripts
+-- are rendered from the database instead of the channel history
+CREATE TABLE IF NOT EXISTS ticket_messages (
+    ticket_id INTEGER NOT NULL REFERENCES tickets(id) ON DELETE CASCADE,
+    message_id BIGINT NOT NULL,
+    author_id BIGINT NOT NULL,
+    author_name TEXT NOT NULL,
+    content TEXT,
+    embeds JSONB, -- [{"title", "description"}]
+    attachments JSONB, -- [{"filename", "url"}]
+    created_at TIMESTAMP NOT NULL,
+    edited_at TIMESTAMP,
+    deleted_at TIMESTAMP,
+    -- Message ids are snowflakes, so this is also chronological order
+    PRIMARY KEY (ticket_id, message_id)
+);
@@ -0,0 +1,5 @@
+-- Transcript bodies move to the content-addressed file store under TRANSCRIPT_PATH
+-- (transcripts.py); tickets only keep the SHA-256 of the HTML. The bot empties
+-- transcript_gz/transcript_text as it moves older transcripts into the store.
+ALTER TABLE tickets ADD COLUMN IF NOT EXISTS transcript_hash CHAR(64);
+CREATE INDEX IF NOT EXISTS tickets_transcript_hash_idx ON tickets (transcript_hash) WHERE transcript_hash IS NOT NULL;
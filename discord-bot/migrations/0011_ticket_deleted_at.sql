@@ -0,0 +1,3 @@
+-- Set once a ticket channel is deleted, so the bot's ticket registry (ticket_registry.py)
+-- only loads tickets whose channel still exists
+ALTER TABLE tickets ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP;
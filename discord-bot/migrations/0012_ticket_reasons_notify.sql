@@ -0,0 +1,16 @@
+-- Notify bot processes when a guild's ticket reasons change so the cached launcher menu is rebuilt
+CREATE OR REPLACE FUNCTION notify_ticket_reasons_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('ticket_reasons_changed', OLD.guild_id::text);
+    ELSE
+        PERFORM pg_notify('ticket_reasons_changed', NEW.guild_id::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS ticket_reasons_changed ON ticket_reasons;
+CREATE TRIGGER ticket_reasons_changed
+    AFTER INSERT OR UPDATE OR DELETE ON ticket_reasons
+    FOR EACH ROW EXECUTE FUNCTION notify_ticket_reasons_changed();
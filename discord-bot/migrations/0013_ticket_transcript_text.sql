@@ -0,0 +1,2 @@
+-- Transcript text column for tickets tables created before it existed (previously migrate_transcripts.py)
+ALTER TABLE tickets ADD COLUMN IF NOT EXISTS transcript_text TEXT;
@@ -0,0 +1,33 @@
+-- Rows that landed in server_logs_default for a month without its own partition block
+-- CREATE TABLE ... PARTITION OF for that month. Move them into the new partition first.
+CREATE OR REPLACE FUNCTION create_server_logs_partition(month DATE) RETURNS TEXT AS $$
+DECLARE
+    start_date DATE := date_trunc('month', month)::date;
+    end_date DATE := (date_trunc('month', month) + INTERVAL '1 month')::date;
+    partition_name TEXT := 'server_logs_p' || to_char(start_date, 'YYYYMM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM server_logs_default WHERE created_at >= start_date AND created_at < end_date) THEN
+        -- Build the partition as a plain table, move the month's rows over, then attach it
+        EXECUTE format('CREATE TABLE %I (LIKE server_logs INCLUDING DEFAULTS)', partition_name);
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM server_logs_default WHERE created_at >= %L AND created_at < %L RETURNING *)
+             INSERT INTO %I SELECT * FROM moved',
+            start_date, end_date, partition_name
+        );
+        EXECUTE format(
+            'ALTER TABLE server_logs ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+            partition_name, start_date, end_date
+        );
+    ELSE
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF server_logs FOR VALUES FROM (%L) TO (%L)',
+            partition_name, start_date, end_date
+        );
+    END IF;
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,65 @@
+import logging
+import discord
+
+def _minimal():
+    intents = discord.Intents.default()
+    return dict(
+        intents=intents,
+        max_messages=None,
+        member_cache_flags=discord.MemberCacheFlags.none(),
+        chunk_guilds_at_startup=False
+    )
+
+def _moderation():
+    intents = discord.Intents.default()
+    intents.members = True
+    intents.message_content = True
+    intents.presences = False
+    intents.typing = False
+    return dict(
+        intents=intents,
+        max_messages=1000,
+        # Cache members we see in voice or who join, but don't chunk whole guilds
+        member_cache_flags=discord.MemberCacheFlags.from_intents(intents),
+        chunk_guilds_at_startup=False
+    )
+
+def _full():
+    return dict(
+        intents=discord.Intents.all(),
+        max_messages=1000,
+        member_cache_flags=discord.MemberCacheFlags.all(),
+        chunk_guilds_at_startup=True
+    )
+
+# Runtime profiles, selected with BOT_PROFILE
+PROFILES = {
+    "minimal": _minimal,
+    "moderation": _moderation,
+    "full": _full,
+}
+
+def build_profile(name):
+    """Return the commands.Bot keyword arguments for a profile."""
+    factory = PROFILES.get(name)
+    if factory is None:
+        logging.warning(f"Unknown BOT_PROFILE '{name}', using 'full'")
+        factory = _full
+    return factory()
+
+def check_cog_requirements(bot):
+    """
+    Warn about cogs whose REQUIRED_INTENTS (intent flag names) or
+    REQUIRES_MESSAGE_CACHE aren't satisfied by the running profile.
+    Returns the list of warnings.
+    """
+    problems = []
+    for name, cog in bot.cogs.items():
+        missing = [i for i in getattr(cog, "REQUIRED_INTENTS", ()) if not getattr(bot.intents, i)]
+        if missing:
+            problems.append(f"{name} needs intents not enabled by this profile: {', '.join(missing)}")
+        if getattr(cog, "REQUIRES_MESSAGE_CACHE", False) and not bot.profile.get("max_messages"):
+            problems.append(f"{name} needs a message cache (max_messages) to log edits/deletes of older messages")
+    for problem in problems:
+        logging.warning(problem)
+    return problems
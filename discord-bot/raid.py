@@ -0,0 +1,111 @@
+import datetime
+import time
+from collections import deque
+from config import Config
+
+NORMAL = "normal"
+RAID_STARTED = "started"
+RAID_ONGOING = "ongoing"
+
+# (max account age in seconds, label); None catches everything older
+AGE_BUCKETS = (
+    (3600, "< 1 hour"),
+    (86400, "< 1 day"),
+    (7 * 86400, "< 1 week"),
+    (30 * 86400, "< 30 days"),
+    (None, "Older"),
+)
+
+def age_bucket(age_seconds):
+    for i, (limit, _) in enumerate(AGE_BUCKETS):
+        if limit is None or age_seconds < limit:
+            return i
+
+class _GuildJoins:
+    __slots__ = ("joins", "window_histogram", "raid_until", "started_at", "total", "histogram", "flagged")
+
+    def __init__(self):
+        # Sliding window of (monotonic time, age bucket, member if flagged)
+        self.joins = deque()
+        self.window_histogram = [0] * len(AGE_BUCKETS)
+        self.raid_until = 0.0
+        self.started_at = None
+        # Accumulated since the last summary was taken
+        self.total = 0
+        self.histogram = [0] * len(AGE_BUCKETS)
+        self.flagged = []
+
+class RaidDetector:
+    """
+    Tracks join bursts per guild. When RAID_JOIN_THRESHOLD joins land within
+    RAID_WINDOW_SECONDS the guild enters raid mode for RAID_MODE_SECONDS
+    (extended by every further join), during which joins are collected
+    for periodic summaries instead of being announced one by one.
+    """
+
+    def __init__(self):
+        self._guilds = {}
+
+    def record_join(self, member):
+        now = time.monotonic()
+        age = (datetime.datetime.now(datetime.timezone.utc) - member.created_at).total_seconds()
+        bucket = age_bucket(age)
+
+        state = self._guilds.get(member.guild.id)
+        if state is None:
+            state = self._guilds[member.guild.id] = _GuildJoins()
+
+        suspect = age < Config.RAID_MIN_ACCOUNT_AGE_HOURS * 3600
+        state.joins.append((now, bucket, member if suspect else None))
+        state.window_histogram[bucket] += 1
+        while now - state.joins[0][0] > Config.RAID_WINDOW_SECONDS:
+            old_bucket = state.joins.popleft()[1]
+            state.window_histogram[old_bucket] -= 1
+
+        was_raid = state.raid_until > now
+        if not was_raid and len(state.joins) < Config.RAID_JOIN_THRESHOLD:
+            return NORMAL
+
+        if not was_raid:
+            # Fold the burst that tripped the threshold into the first summary
+            state.started_at = datetime.datetime.now(datetime.timezone.utc)
+            state.histogram = list(state.window_histogram)
+            state.total = len(state.joins)
+            state.flagged = [m for _, _, m in state.joins if m is not None][:Config.RAID_MAX_FLAGGED]
+        else:
+            state.total += 1
+            state.histogram[bucket] += 1
+            if suspect and len(state.flagged) < Config.RAID_MAX_FLAGGED:
+                state.flagged.append(member)
+
+        state.raid_until = now + Config.RAID_MODE_SECONDS
+        return RAID_ONGOING if was_raid else RAID_STARTED
+
+    def take_summaries(self):
+        """
+        Yield (guild_id, summary) for every guild with joins collected since
+        the previous call. summary["ended"] is True once raid mode has lapsed.
+        """
+        now = time.monotonic()
+        for guild_id, state in list(self._guilds.items()):
+            ended = state.raid_until <= now
+            if state.total or (ended and state.started_at):
+                summary = {
+                    "started_at": state.started_at,
+                    "joins": state.total,
+                    "histogram": [(label, count) for (_, label), count in zip(AGE_BUCKETS, state.histogram)],
+                    "flagged": state.flagged,
+                    "ended": ended,
+                }
+                state.total = 0
+                state.histogram = [0] * len(AGE_BUCKETS)
+                state.flagged = []
+                if ended:
+                    state.started_at = None
+                yield guild_id, summary
+
+            # Drop guilds that are quiet again so the table stays small
+            if ended and (not state.joins or now - state.joins[-1][0] > Config.RAID_WINDOW_SECONDS):
+                del self._guilds[guild_id]
+
+raid_detector = RaidDetector()
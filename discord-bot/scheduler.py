@@ -0,0 +1,229 @@
+import asyncio
+import functools
+import logging
+import time
+from collections import deque
+import discord
+from config import Config
+from database import QueryStats
+from metrics import instrumentation
+
+def guild_id_of(args):
+    """Best-effort guild id for an event/command from its arguments."""
+    for arg in args:
+        if isinstance(arg, discord.Guild):
+            return arg.id
+        guild_id = getattr(arg, "guild_id", None)
+        if guild_id:
+            return guild_id
+        guild = getattr(arg, "guild", None)
+        if guild is not None:
+            return guild.id
+    return None
+
+class _GuildQueue:
+    __slots__ = (
+        "guild_id", "jobs", "enforcement", "weight", "deficit", "running", "active",
+        "submitted", "completed", "dropped", "throttled", "held", "max_depth", "wait"
+    )
+
+    def __init__(self, guild_id, weight):
+        self.guild_id = guild_id
+        # (enqueued at, func, args)
+        self.jobs = deque()
+        # Moderation jobs: never dropped, and run before the guild's other jobs
+        self.enforcement = deque()
+        self.weight = weight
+        self.deficit = 0
+        self.running = 0
+        self.active = False
+        self.submitted = 0
+        self.completed = 0
+        # Rejected because the queue was full
+        self.dropped = 0
+        # Jobs that had to wait because the guild was at its concurrency cap
+        self.throttled = 0
+        # Queued jobs already counted in throttled
+        self.held = 0
+        self.max_depth = 0
+        self.wait = QueryStats()
+
+    def __len__(self):
+        return len(self.jobs) + len(self.enforcement)
+
+class GuildScheduler:
+    """
+    Runs event handler work through one bounded queue per guild.
+    At most SCHEDULER_CONCURRENCY jobs run at once overall (keep it near
+    DB_POOL_MAX_SIZE) and at most SCHEDULER_GUILD_CONCURRENCY per guild.
+    Guilds with work waiting are served by deficit round robin, so each
+    gets a share of the free slots proportional to its weight (1 unless
+    set in SCHEDULER_GUILD_WEIGHTS) no matter how much it has queued. When
+    a guild already has SCHEDULER_GUILD_QUEUE_MAX jobs waiting, new ones
+    are dropped and counted against that guild. Enforcement jobs
+    (submit(..., enforce=True), e.g. automod) are exempt from that limit
+    and go ahead of the guild's other queued work, so a flood of events
+    sheds logging, never moderation.
+    """
+
+    def __init__(self):
+        self._queues = {}
+        # Guild queues with jobs waiting, in service order
+        self._active = deque()
+        self._slots = None
+        self._wakeup = None
+        self._task = None
+        self._running = set()
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self):
+        """Jobs queued or running, across all guilds."""
+        return sum(len(q) + q.running for q in self._queues.values())
+
+    def start(self):
+        if not self.running:
+            self._slots = asyncio.Semaphore(Config.SCHEDULER_CONCURRENCY)
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop dispatching and wait for running jobs; queued jobs are discarded."""
+        if self.running:
+            self._task.cancel()
+        self._task = None
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def queue_for(self, guild_id):
+        queue = self._queues.get(guild_id)
+        if queue is None:
+            weight = Config.SCHEDULER_GUILD_WEIGHTS.get(guild_id, 1)
+            queue = self._queues[guild_id] = _GuildQueue(guild_id, weight)
+        return queue
+
+    def submit(self, guild_id, func, *args, enforce=False):
+        """
+        Queue func(*args) for guild_id. Returns False if the guild's queue was
+        full; enforce=True jobs are always queued.
+        """
+        if not self.running:
+            # Not started (standalone scripts), run it as a plain task
+            asyncio.create_task(func(*args))
+            return True
+
+        queue = self.queue_for(guild_id)
+        if enforce:
+            queue.enforcement.append((time.perf_counter(), func, args))
+        elif len(queue.jobs) >= Config.SCHEDULER_GUILD_QUEUE_MAX:
+            queue.dropped += 1
+            instrumentation.count(
+                "scheduler.dropped", f"Guild {guild_id} work queue is full, dropping {func.__qualname__}", logging.WARNING
+            )
+            return False
+        else:
+            queue.jobs.append((time.perf_counter(), func, args))
+        queue.submitted += 1
+        queue.max_depth = max(queue.max_depth, len(queue))
+        if not queue.active:
+            queue.active = True
+            self._active.append(queue)
+        self._wakeup.set()
+        return True
+
+    def _next_job(self):
+        """Pick the next (queue, job) by deficit round robin, or None if nothing may run now."""
+        # Weights are >= 1, so two passes always reach any guild that isn't capped
+        for _ in range(2 * len(self._active)):
+            queue = self._active[0]
+            if queue.running >= Config.SCHEDULER_GUILD_CONCURRENCY:
+                # Count each waiting job once, however often the guild is scanned
+                queue.throttled += len(queue) - queue.held
+                queue.held = len(queue)
+                self._active.rotate(-1)
+                continue
+            if queue.deficit < 1:
+                queue.deficit += queue.weight
+                self._active.rotate(-1)
+                continue
+
+            queue.deficit -= 1
+            job = queue.enforcement.popleft() if queue.enforcement else queue.jobs.popleft()
+            queue.held = max(queue.held - 1, 0)
+            if not queue:
+                self._active.popleft()
+                queue.active = False
+                queue.deficit = 0
+            return queue, job
+        return None
+
+    async def _run(self):
+        while True:
+            await self._slots.acquire()
+            picked = self._next_job()
+            while picked is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                picked = self._next_job()
+
+            queue, job = picked
+            queue.running += 1
+            task = asyncio.create_task(self._execute(queue, job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _execute(self, queue, job):
+        enqueued_at, func, args = job
+        started = time.perf_counter()
+        queue.wait.record((started - enqueued_at) * 1000, 0)
+        try:
+            await func(*args)
+        except Exception:
+            logging.exception(f"Scheduled {func.__qualname__} failed in guild {queue.guild_id}")
+        finally:
+            queue.running -= 1
+            queue.completed += 1
+            self._slots.release()
+            self._wakeup.set()
+            cog, _, name = func.__qualname__.rpartition(".")
+            instrumentation.record("scheduled", cog or "-", name, queue.guild_id, (time.perf_counter() - started) * 1000)
+
+    def stats(self):
+        """Per-guild counters, busiest (most queued, then most dropped) first."""
+        rows = [
+            {
+                "guild_id": q.guild_id,
+                "weight": q.weight,
+                "queued": len(q),
+                "running": q.running,
+                "submitted": q.submitted,
+                "completed": q.completed,
+                "dropped": q.dropped,
+                "throttled": q.throttled,
+                "max_depth": q.max_depth,
+                "wait_p99_ms": q.wait.percentile(0.99),
+                "wait_max_ms": round(q.wait.max_ms, 2),
+            }
+            for q in self._queues.values()
+        ]
+        rows.sort(key=lambda r: (r["queued"], r["dropped"], r["throttled"]), reverse=True)
+        return rows
+
+def scheduled(func):
+    """
+    Decorator for cog listeners: the listener returns immediately and the
+    body runs through guild_scheduler under the event's guild. Events with
+    no guild (DMs) run inline.
+    """
+    @functools.wraps(func)
+    async def listener(self, *args):
+        guild_id = guild_id_of(args)
+        if guild_id is None:
+            return await func(self, *args)
+        guild_scheduler.submit(guild_id, func, self, *args)
+    return listener
+
+guild_scheduler = GuildScheduler()
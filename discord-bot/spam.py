@@ -0,0 +1,86 @@
+import time
+from collections import OrderedDict, deque
+from config import Config
+
+class _UserActivity:
+    __slots__ = ("messages", "mentions", "mention_total", "last_hash", "duplicates", "last_seen")
+
+    def __init__(self, now):
+        self.messages = deque(maxlen=Config.SPAM_MESSAGE_LIMIT)
+        self.mentions = deque()
+        self.mention_total = 0
+        self.last_hash = None
+        self.duplicates = 0
+        self.last_seen = now
+
+class SpamTracker:
+    """
+    Sliding-window flood detection kept entirely in memory.
+    Each (guild, user) pair holds a fixed-size ring of recent message
+    times, a consecutive-duplicate counter and a windowed mention count.
+    Idle pairs are evicted in LRU order, and the table never grows past
+    SPAM_TRACKER_MAX_USERS entries.
+    """
+
+    def __init__(self):
+        self._users = OrderedDict()
+
+    def __len__(self):
+        return len(self._users)
+
+    def record(self, message):
+        """Record a message and return a reason string if it trips a spam check."""
+        now = time.monotonic()
+        window = Config.SPAM_WINDOW_SECONDS
+        key = (message.guild.id, message.author.id)
+
+        state = self._users.get(key)
+        if state is None:
+            state = _UserActivity(now)
+            self._users[key] = state
+        else:
+            self._users.move_to_end(key)
+        self._evict(now)
+
+        # Duplicates only count while they keep arriving inside the window
+        content_hash = hash(message.content) if message.content else None
+        if content_hash is not None and content_hash == state.last_hash and now - state.last_seen <= window:
+            state.duplicates += 1
+        else:
+            state.duplicates = 1
+        state.last_hash = content_hash
+        state.last_seen = now
+
+        state.messages.append(now)
+
+        mention_count = len(message.raw_mentions) + len(message.raw_role_mentions) + (1 if message.mention_everyone else 0)
+        if mention_count:
+            state.mentions.append((now, mention_count))
+            state.mention_total += mention_count
+        while state.mentions and now - state.mentions[0][0] > window:
+            state.mention_total -= state.mentions.popleft()[1]
+
+        reason = None
+        if len(state.messages) == state.messages.maxlen and now - state.messages[0] <= window:
+            reason = f"Sent {len(state.messages)} messages in {window}s"
+        elif content_hash is not None and state.duplicates >= Config.SPAM_DUPLICATE_LIMIT:
+            reason = f"Repeated the same message {state.duplicates} times"
+        elif state.mention_total >= Config.SPAM_MENTION_LIMIT:
+            reason = f"Sent {state.mention_total} mentions in {window}s"
+
+        if reason:
+            # Start over so one burst only triggers one punishment
+            del self._users[key]
+        return reason
+
+    def _evict(self, now):
+        idle = Config.SPAM_IDLE_SECONDS
+        users = self._users
+        while users:
+            key, state = next(iter(users.items()))
+            if len(users) > Config.SPAM_TRACKER_MAX_USERS or now - state.last_seen > idle:
+                users.popitem(last=False)
+            else:
+                break
+
+spam_tracker = SpamTracker()
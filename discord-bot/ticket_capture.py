@@ -0,0 +1,234 @@
+import asyncio
+import datetime
+import json
+import logging
+import discord
+from database import db
+from config import Config
+from log_writer import run_batches
+from ticket_registry import ticket_registry
+
+LAST_MESSAGES = db.query(
+    "ticket_messages.last",
+    """SELECT t.channel_id, (SELECT MAX(m.message_id) FROM ticket_messages m WHERE m.ticket_id = t.id) AS last_message_id
+       FROM tickets t WHERE t.deleted_at IS NULL"""
+)
+INSERT_MESSAGES = db.query(
+    "ticket_messages.insert",
+    """INSERT INTO ticket_messages (ticket_id, message_id, author_id, author_name, content, embeds, attachments, created_at, edited_at)
+       VALUES ($1, $2, $3, $4, $5, $6::jsonb, $7::jsonb, $8, $9)
+       ON CONFLICT (ticket_id, message_id) DO NOTHING"""
+)
+EDIT_MESSAGES = db.query(
+    "ticket_messages.edit",
+    """UPDATE ticket_messages SET
+           content = COALESCE($3, content),
+           embeds = COALESCE($4::jsonb, embeds),
+           attachments = COALESCE($5::jsonb, attachments),
+           edited_at = COALESCE($6, edited_at)
+       WHERE ticket_id = $1 AND message_id = $2"""
+)
+DELETE_MESSAGES = db.query(
+    "ticket_messages.delete",
+    "UPDATE ticket_messages SET deleted_at = $3 WHERE ticket_id = $1 AND message_id = $2 AND deleted_at IS NULL"
+)
+MESSAGES_FOR_TICKET = """SELECT author_name, content, embeds, attachments, created_at, edited_at, deleted_at
+                         FROM ticket_messages WHERE ticket_id = $1 ORDER BY message_id"""
+
+def _utc(value):
+    return value.astimezone(datetime.timezone.utc).replace(tzinfo=None) if value else None
+
+def _embeds_json(pairs):
+    """[(title, description)] of a message's embeds, as stored in ticket_messages.embeds."""
+    return json.dumps([{"title": title, "description": description} for title, description in pairs if title or description])
+
+def _attachments_json(pairs):
+    """[(filename, url)] of a message's attachments, as stored in ticket_messages.attachments."""
+    return json.dumps([{"filename": filename, "url": url} for filename, url in pairs])
+
+class TicketMessageStore:
+    """
+    Records the messages of ticket channels (new messages, edits, deletes)
+    into ticket_messages as they arrive, so a transcript is a local read.
+    ticket_registry decides which channels are tickets.
+    Changes are queued and written every TICKET_CAPTURE_FLUSH_MS or
+    TICKET_CAPTURE_FLUSH_ROWS rows by the same batching loop as the
+    server_logs writer (log_writer.run_batches).
+
+    Messages sent while the bot was offline are filled in from the channel
+    history once per ticket (catch_up), starting after the newest message
+    stored when the bot started, and only if the channel's last_message_id
+    shows there is something newer. At startup only open tickets are
+    caught up; closed ones are caught up when a transcript is taken.
+    """
+
+    def __init__(self):
+        # channel_id -> newest stored message id, for tickets not caught up yet this run
+        self._resume_after = {}
+        # channel_id -> running catch_up task
+        self._catching_up = {}
+        self._queue = None
+        self._task = None
+        self._catch_up_task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self):
+        return self._queue.qsize() if self.running else 0
+
+    def start(self):
+        if not self.running:
+            self._queue = asyncio.Queue(maxsize=Config.TICKET_CAPTURE_BUFFER_MAX)
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Write everything still queued and stop."""
+        if self._catch_up_task is not None:
+            self._catch_up_task.cancel()
+        if self.running:
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+
+    async def load(self):
+        """Note where each ticket's stored messages end, for catch_up(). Load ticket_registry first."""
+        rows = await db.fetch(LAST_MESSAGES)
+        self._resume_after = {r['channel_id']: r['last_message_id'] or 0 for r in rows}
+
+    def forget(self, channel_id):
+        self._resume_after.pop(channel_id, None)
+
+    # Capture
+
+    async def _put(self, item):
+        if not self.running:
+            # Not started (e.g. standalone scripts), write directly
+            return await self._write([item])
+        await self._queue.put(item)
+
+    async def add_message(self, message):
+        ticket = ticket_registry.get(message.channel.id)
+        if ticket is not None:
+            await self._put((INSERT_MESSAGES, self.message_row(ticket.id, message)))
+
+    async def edit(self, payload):
+        ticket = ticket_registry.get(payload.channel_id)
+        if ticket is None:
+            return
+        data = payload.data
+        # Partial updates (e.g. link previews) leave out the fields they don't change
+        await self._put((EDIT_MESSAGES, (
+            ticket.id,
+            payload.message_id,
+            data.get("content"),
+            _embeds_json((e.get("title"), e.get("description")) for e in data["embeds"]) if "embeds" in data else None,
+            _attachments_json((a["filename"], a["url"]) for a in data["attachments"]) if "attachments" in data else None,
+            _utc(discord.utils.parse_time(data.get("edited_timestamp")))
+        )))
+
+    async def delete(self, channel_id, message_ids):
+        ticket = ticket_registry.get(channel_id)
+        if ticket is None:
+            return
+        deleted_at = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        for message_id in message_ids:
+            await self._put((DELETE_MESSAGES, (ticket.id, message_id, deleted_at)))
+
+    @staticmethod
+    def message_row(ticket_id, message):
+        return (
+            ticket_id,
+            message.id,
+            message.author.id,
+            str(message.author),
+            message.content or None,
+            _embeds_json((e.title, e.description) for e in message.embeds),
+            _attachments_json((a.filename, a.url) for a in message.attachments),
+            _utc(message.created_at),
+            _utc(message.edited_at)
+        )
+
+    async def catch_up(self, channel):
+        """Store messages the channel got while the bot was offline (once per run)."""
+        task = self._catching_up.get(channel.id)
+        if task is None:
+            after = self._resume_after.pop(channel.id, None)
+            ticket = ticket_registry.get(channel.id)
+            if after is None or ticket is None or not self.has_newer(channel, after):
+                return
+            task = self._catching_up[channel.id] = asyncio.create_task(self._catch_up(channel, ticket.id, after))
+            task.add_done_callback(lambda _: self._catching_up.pop(channel.id, None))
+        await task
+
+    @staticmethod
+    def has_newer(channel, after):
+        """Whether the channel has messages after the message id after, going by its cached last_message_id."""
+        last = getattr(channel, "last_message_id", None)
+        return last is not None and last > after
+
+    async def _catch_up(self, channel, ticket_id, after):
+        count = 0
+        try:
+            async for message in channel.history(limit=None, after=discord.Object(id=after) if after else None, oldest_first=True):
+                await self._put((INSERT_MESSAGES, self.message_row(ticket_id, message)))
+                count += 1
+        except discord.HTTPException as e:
+            logging.warning(f"Could not catch up ticket channel {channel.id}: {e}")
+        if count:
+            logging.info(f"Caught up {count} message(s) in ticket channel {channel.id}")
+
+    def start_catch_up(self, bot):
+        """Catch up open ticket channels with new messages, one at a time in the background."""
+        if self._catch_up_task is None or self._catch_up_task.done():
+            self._catch_up_task = asyncio.create_task(self._catch_up_all(bot))
+
+    async def _catch_up_all(self, bot):
+        for channel_id, after in list(self._resume_after.items()):
+            ticket = ticket_registry.get(channel_id)
+            if ticket is None or ticket.status != "open":
+                continue
+            channel = bot.get_channel(channel_id)
+            # Skip without a history request when nothing arrived while offline
+            if channel is not None and self.has_newer(channel, after):
+                await self.catch_up(channel)
+
+    # Reading
+
+    async def flush(self):
+        """Wait until everything queued before this call is written."""
+        if self.running:
+            # run_batches resolves the marker once the batch holding it is written,
+            # so later traffic can't hold this up
+            marker = asyncio.get_running_loop().create_future()
+            await self._queue.put(marker)
+            await marker
+
+    async def messages(self, ticket_id):
+        """Yield the ticket's stored messages, oldest first, without loading them all at once."""
+        async with db.acquire() as connection:
+            async with connection.transaction():
+                async for row in connection.cursor(MESSAGES_FOR_TICKET, ticket_id, prefetch=Config.TICKET_CAPTURE_FLUSH_ROWS):
+                    yield row
+
+    # Writer
+
+    async def _run(self):
+        await run_batches(self._queue, self._write, Config.TICKET_CAPTURE_FLUSH_MS, Config.TICKET_CAPTURE_FLUSH_ROWS)
+
+    async def _write(self, items):
+        # Inserts before edits before deletes: a message is always created before it changes
+        grouped = {INSERT_MESSAGES: [], EDIT_MESSAGES: [], DELETE_MESSAGES: []}
+        for query, record in items:
+            grouped[query].append(record)
+        try:
+            async with db.transaction() as tx:
+                for query, records in grouped.items():
+                    if records:
+                        await tx.executemany(query, records)
+        except Exception as e:
+            logging.error(f"Failed to write {len(items)} ticket message change(s): {e}")
+
+ticket_messages = TicketMessageStore()
@@ -0,0 +1,27 @@
+from database import db, NotifyCache
+
+class TicketReasonCache(NotifyCache):
+    """
+    Ticket reasons per guild ({reason id: row}, in creation order), for the
+    ticket launcher's menu and the channel it opens. A guild's entry is
+    dropped when the ticket_reasons trigger in migrations/0012 sends a
+    NOTIFY for it, so reasons added or removed in the web panel show up too.
+    A burst of launcher clicks on a cold guild shares one query.
+    """
+    CHANNEL = "ticket_reasons_changed"
+
+    def __init__(self):
+        self.query = db.query(
+            "ticket_reasons.by_guild",
+            "SELECT id, label, description, emoji, category_id, required_roles FROM ticket_reasons WHERE guild_id = $1 ORDER BY id"
+        )
+        super().__init__(db)
+
+    async def load(self, guild_id):
+        rows = await db.fetch(self.query, guild_id)
+        return {r['id']: r for r in rows}
+
+    async def reason(self, guild_id, reason_id):
+        return (await self.get(guild_id)).get(reason_id)
+
+ticket_reasons = TicketReasonCache()
@@ -0,0 +1,69 @@
+import logging
+from database import db
+
+LOAD_TICKETS = db.query(
+    "tickets.registry_load",
+    """SELECT t.id, t.guild_id, t.channel_id, t.owner_id, t.status, t.claimed_by,
+              ARRAY(SELECT m.user_id FROM ticket_members m WHERE m.ticket_id = t.id) AS members
+       FROM tickets t WHERE t.deleted_at IS NULL"""
+)
+MARK_DELETED = db.query(
+    "tickets.mark_deleted",
+    "UPDATE tickets SET deleted_at = CURRENT_TIMESTAMP WHERE id = ANY($1::INTEGER[]) AND deleted_at IS NULL"
+)
+
+class TicketRecord:
+    __slots__ = ("id", "guild_id", "channel_id", "owner_id", "status", "claimed_by", "members")
+
+    def __init__(self, id, guild_id, channel_id, owner_id, status="open", claimed_by=None, members=()):
+        self.id = id
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.owner_id = owner_id
+        self.status = status
+        self.claimed_by = claimed_by
+        # Users added with /add, not counting the owner
+        self.members = set(members)
+
+class TicketRegistry:
+    """
+    In-memory index of ticket channels: channel_id -> TicketRecord with the
+    ticket's id, status, owner, claimer and added members. Loaded once at
+    startup (tickets whose channel wasn't deleted) and kept current by the
+    Tickets cog as tickets are opened, claimed, closed, reopened and
+    deleted, so ticket commands and buttons recognise a ticket channel,
+    whatever it's named, without reading the database.
+    """
+
+    def __init__(self):
+        self._tickets = {}
+
+    def __len__(self):
+        return len(self._tickets)
+
+    async def load(self):
+        rows = await db.fetch(LOAD_TICKETS)
+        self._tickets = {
+            r['channel_id']: TicketRecord(r['id'], r['guild_id'], r['channel_id'], r['owner_id'], r['status'], r['claimed_by'], r['members'])
+            for r in rows
+        }
+        logging.info(f"Loaded {len(self._tickets)} ticket channel(s).")
+
+    def get(self, channel_id):
+        return self._tickets.get(channel_id)
+
+    def records(self):
+        return list(self._tickets.values())
+
+    def add(self, ticket_id, guild_id, channel_id, owner_id):
+        record = self._tickets[channel_id] = TicketRecord(ticket_id, guild_id, channel_id, owner_id)
+        return record
+
+    async def forget(self, *channel_ids):
+        """Drop deleted ticket channels and mark their tickets deleted."""
+        records = [r for r in (self._tickets.pop(c, None) for c in channel_ids) if r is not None]
+        if records:
+            await db.execute(MARK_DELETED, [r.id for r in records])
+        return records
+
+ticket_registry = TicketRegistry()
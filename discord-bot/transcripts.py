@@ -0,0 +1,315 @@
+import asyncio
+import gzip
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from database import db
+from config import Config
+from ticket_capture import ticket_messages
+
+HEADER = """<!DOCTYPE html>
+<html class="dark">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; background-color: #0f172a; color: #e2e8f0; padding: 2rem; max-width: 800px; margin: 0 auto; }}
+.message {{ margin-bottom: 1rem; padding: 1rem; background: rgba(255,255,255,0.05); border-radius: 0.5rem; }}
+.author {{ font-weight: bold; color: #818cf8; }}
+.time {{ font-size: 0.75rem; color: #64748b; margin-left: 0.5rem; }}
+.content {{ margin-top: 0.25rem; white-space: pre-wrap; word-wrap: break-word; }}
+.embed {{ margin-top: 0.5rem; padding: 0.5rem 0.75rem; border-left: 3px solid #818cf8; background: rgba(255,255,255,0.03); }}
+.attachment a {{ color: #38bdf8; }}
+h1 {{ border-bottom: 1px solid rgba(255,255,255,0.1); padding-bottom: 1rem; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+"""
+FOOTER = "</body>\n</html>\n"
+
+LEGACY_TRANSCRIPTS = db.query(
+    "tickets.legacy_transcripts",
+    """SELECT id, transcript_gz, transcript_text FROM tickets
+       WHERE transcript_hash IS NULL AND (transcript_gz IS NOT NULL OR transcript_text IS NOT NULL)
+       ORDER BY id LIMIT $1"""
+)
+SET_TRANSCRIPT = db.query(
+    "tickets.set_transcript",
+    "UPDATE tickets SET transcript_hash = $2, transcript_gz = NULL, transcript_text = NULL WHERE id = $1"
+)
+REFERENCED_TRANSCRIPTS = db.query(
+    "tickets.referenced_transcripts",
+    "SELECT DISTINCT transcript_hash FROM tickets WHERE transcript_hash = ANY($1::CHAR(64)[])"
+)
+
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+class TranscriptStore:
+    """
+    Content-addressed transcript files under TRANSCRIPT_PATH. Each
+    transcript is stored gzipped as <root>/ab/cd/<sha256>.html.gz, where
+    the SHA-256 is of the uncompressed HTML; tickets.transcript_hash
+    points at it. Identical transcripts share one file.
+
+    Files are never removed as a ticket moves off them, since another
+    ticket may be about to point at the same content. Instead a sweep
+    every TRANSCRIPT_SWEEP_INTERVAL_HOURS removes files no ticket points
+    at that haven't been written or reused (commit() touches them) for
+    TRANSCRIPT_SWEEP_GRACE_MINUTES.
+
+    start() also moves transcripts still held in the tickets table
+    (transcript_text, transcript_gz) into the store, in the background.
+    """
+    LEGACY_BATCH = 20
+    SWEEP_BATCH = 500
+
+    def __init__(self, root):
+        self.root = root
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.running:
+            self._task.cancel()
+        self._task = None
+
+    def path_for(self, digest):
+        if not _DIGEST.match(digest):
+            raise ValueError(f"Not a transcript hash: {digest!r}")
+        return os.path.join(self.root, digest[:2], digest[2:4], f"{digest}.html.gz")
+
+    def temp_file(self):
+        """A file on the store's filesystem, so commit() is a rename."""
+        directory = os.path.join(self.root, "tmp")
+        os.makedirs(directory, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False)
+
+    def commit(self, temp_path, digest):
+        """Move a finished temp file into place (or drop it if the content is already stored)."""
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            # Restart the sweep's grace period, the caller is about to point a ticket at it
+            os.utime(path)
+            os.unlink(temp_path)
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+        return path
+
+    def put(self, data):
+        """Store an in-memory HTML document; returns its hash."""
+        digest = hashlib.sha256(data).hexdigest()
+        with self.temp_file() as temp:
+            temp.write(gzip.compress(data, compresslevel=Config.TRANSCRIPT_COMPRESS_LEVEL, mtime=0))
+        self.commit(temp.name, digest)
+        return digest
+
+    async def point(self, ticket_id, digest):
+        """Point the ticket at digest. The file it pointed at before is left to sweep()."""
+        await db.execute(SET_TRANSCRIPT, ticket_id, digest)
+
+    async def _run(self):
+        await self._move_legacy()
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logging.error(f"Sweeping unused transcripts in {self.root} failed: {e}")
+            await asyncio.sleep(Config.TRANSCRIPT_SWEEP_INTERVAL_HOURS * 3600)
+
+    def _idle_files(self):
+        """{digest: path} of stored files untouched for the grace period."""
+        cutoff = time.time() - Config.TRANSCRIPT_SWEEP_GRACE_MINUTES * 60
+        found = {}
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                digest = filename[:-len(".html.gz")]
+                if not filename.endswith(".html.gz") or not _DIGEST.match(digest):
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        found[digest] = path
+                except FileNotFoundError:
+                    pass
+        return found
+
+    async def sweep(self):
+        """Remove stored files no ticket points at."""
+        idle = await asyncio.to_thread(self._idle_files)
+        cutoff = time.time() - Config.TRANSCRIPT_SWEEP_GRACE_MINUTES * 60
+        digests = list(idle)
+        removed = 0
+        for start in range(0, len(digests), self.SWEEP_BATCH):
+            batch = digests[start:start + self.SWEEP_BATCH]
+            referenced = {r['transcript_hash'] for r in await db.fetch(REFERENCED_TRANSCRIPTS, batch)}
+            for digest in batch:
+                if digest in referenced:
+                    continue
+                try:
+                    # Reused (commit() touched it) since the scan, a ticket may be about to point at it
+                    if os.path.getmtime(idle[digest]) >= cutoff:
+                        continue
+                    os.unlink(idle[digest])
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        if removed:
+            logging.info(f"Removed {removed} unused transcript(s) from {self.root}")
+        return removed
+
+    async def _move_legacy(self):
+        moved = 0
+        try:
+            while True:
+                rows = await db.fetch(LEGACY_TRANSCRIPTS, self.LEGACY_BATCH)
+                if not rows:
+                    break
+                for row in rows:
+                    if row['transcript_gz']:
+                        data = gzip.decompress(row['transcript_gz'])
+                    else:
+                        # Only the message HTML was stored, give it the usual page around it
+                        title = html.escape(f"Transcript: Ticket #{row['id']}")
+                        data = (HEADER.format(title=title) + row['transcript_text'] + FOOTER).encode("utf-8")
+                    await self.point(row['id'], await asyncio.to_thread(self.put, data))
+                    moved += 1
+        except Exception as e:
+            logging.error(f"Moving stored transcripts to {self.root} failed: {e}")
+        if moved:
+            logging.info(f"Moved {moved} stored transcript(s) to {self.root}")
+
+def render_message(row):
+    """One ticket_messages row as an HTML fragment; everything user-controlled is escaped."""
+    marks = " (edited)" if row['edited_at'] else ""
+    if row['deleted_at']:
+        marks += " (deleted)"
+    parts = [
+        f'<div class="message"><span class="author">{html.escape(row["author_name"])}</span>'
+        f'<span class="time">{row["created_at"]:%Y-%m-%d %H:%M:%S} UTC{marks}</span>'
+    ]
+    if row['content']:
+        parts.append(f'<div class="content">{html.escape(row["content"])}</div>')
+    for embed in json.loads(row['embeds'] or "[]"):
+        text = "<br>".join(html.escape(value) for value in (embed["title"], embed["description"]) if value)
+        parts.append(f'<div class="embed">{text}</div>')
+    for attachment in json.loads(row['attachments'] or "[]"):
+        parts.append(
+            f'<div class="attachment"><a href="{html.escape(attachment["url"], quote=True)}">'
+            f'{html.escape(attachment["filename"])}</a></div>'
+        )
+    parts.append("</div>\n")
+    return "".join(parts)
+
+class TranscriptWriter:
+    """
+    Builds a transcript one stored message at a time. Rendered HTML is
+    collected into chunks of CHUNK_CHARS and each chunk is written out as
+    plain HTML (for the Discord attachment) and through gzip into a
+    transcript_store temp file, so memory use doesn't grow with the
+    ticket. Writing, compressing and hashing a chunk happen in a worker
+    thread (await flush() once full is set, and finish()) so a large
+    ticket doesn't hold up the event loop. Use as a context manager;
+    whatever wasn't committed to the store is removed on exit.
+    """
+    CHUNK_CHARS = 64 * 1024
+
+    def __init__(self, title):
+        self.html = tempfile.TemporaryFile()
+        self.compressed = transcript_store.temp_file()
+        self._hash = hashlib.sha256()
+        # mtime=0 keeps the output identical for identical transcripts
+        self._gzip = gzip.GzipFile(fileobj=self.compressed, mode="wb", compresslevel=Config.TRANSCRIPT_COMPRESS_LEVEL, mtime=0)
+        self._chunk = []
+        self._chunk_chars = 0
+        self.messages = 0
+        # Uncompressed bytes written so far
+        self.size = 0
+        self._write(HEADER.format(title=html.escape(title)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write(self, text):
+        self._chunk.append(text)
+        self._chunk_chars += len(text)
+
+    @property
+    def full(self):
+        """A chunk's worth of HTML is waiting for flush()."""
+        return self._chunk_chars >= self.CHUNK_CHARS
+
+    async def flush(self):
+        if not self._chunk:
+            return
+        data = "".join(self._chunk).encode("utf-8")
+        self._chunk.clear()
+        self._chunk_chars = 0
+        await asyncio.to_thread(self._write_out, data)
+
+    def _write_out(self, data):
+        self.html.write(data)
+        self._gzip.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+
+    def add(self, row):
+        self._write(render_message(row))
+        self.messages += 1
+
+    @property
+    def digest(self):
+        return self._hash.hexdigest()
+
+    async def finish(self):
+        """Write the footer, close the compressed file and rewind the HTML one for reading."""
+        self._write(FOOTER)
+        await self.flush()
+        await asyncio.to_thread(self._finish_files)
+
+    def _finish_files(self):
+        self._gzip.close()
+        self.compressed.close()
+        self.html.seek(0)
+
+    def close(self):
+        self.html.close()
+        self.compressed.close()
+        # Still there unless commit() moved it into the store
+        if os.path.exists(self.compressed.name):
+            os.unlink(self.compressed.name)
+
+async def write_transcript(ticket_id, writer):
+    """Stream the ticket's captured messages into writer, oldest first, and finish it."""
+    await ticket_messages.flush()
+    async for row in ticket_messages.messages(ticket_id):
+        writer.add(row)
+        if writer.full:
+            await writer.flush()
+    await writer.finish()
+    return writer
+
+async def save_transcript(ticket_id, writer):
+    """Render the ticket into writer, put it in transcript_store and point the ticket at it."""
+    await write_transcript(ticket_id, writer)
+    await asyncio.to_thread(transcript_store.commit, writer.compressed.name, writer.digest)
+    await transcript_store.point(ticket_id, writer.digest)
+    return writer
+
+transcript_store = TranscriptStore(Config.TRANSCRIPT_PATH)
@@ -0,0 +1,83 @@
+import asyncio
+from collections import deque
+from database import db, NotifyCache
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over a set of phrases.
+    find() scans the text once, case-insensitively, regardless of how many
+    phrases were compiled in.
+    """
+
+    def __init__(self, phrases):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [None]
+
+        for phrase in phrases:
+            key = phrase.lower()
+            if not key:
+                continue
+            node = 0
+            for ch in key:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(None)
+                    self._goto[node][ch] = nxt
+                node = nxt
+            if self._out[node] is None:
+                self._out[node] = phrase
+
+        # Breadth-first pass to fill in failure links; each node also
+        # inherits the match of its failure node so find() can stop early.
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                if self._out[nxt] is None:
+                    self._out[nxt] = self._out[self._fail[nxt]]
+
+    def __bool__(self):
+        return len(self._goto) > 1
+
+    def find(self, text):
+        """Return the first phrase found in text, or None."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text.lower():
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node] is not None:
+                return out[node]
+        return None
+
+class WordFilterCache(NotifyCache):
+    """
+    Compiled word_filters per guild. A guild's matcher is rebuilt only after
+    the word_filters trigger in migrations/0004 sends a NOTIFY for it.
+    """
+    CHANNEL = "word_filters_changed"
+
+    def __init__(self):
+        self.query = db.query("word_filters.by_guild", "SELECT phrase FROM word_filters WHERE guild_id = $1")
+        super().__init__(db)
+
+    async def load(self, guild_id):
+        rows = await db.fetch(self.query, guild_id)
+        phrases = [r['phrase'] for r in rows]
+        return await asyncio.to_thread(PhraseMatcher, phrases) if len(phrases) > 100 else PhraseMatcher(phrases)
+
+    async def find(self, guild_id, text):
+        matcher = await self.get(guild_id)
+        return matcher.find(text) if matcher else None
+
+word_filters = WordFilterCache()
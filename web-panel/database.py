@@ -1,5 +1,8 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+import logging
 import os
 from dotenv import load_dotenv
 
@@ -22,3 +25,17 @@ class Base(DeclarativeBase):
 async def get_db():
     async with async_session() as session:
         yield session
+
+# Latest file in discord-bot/migrations/ that models.py is written against.
+# Migrations are owned by the bot (run `python migrate.py` there).
+SCHEMA_VERSION = 14
+
+async def check_schema_version():
+    async with engine.connect() as conn:
+        try:
+            version = (await conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations"))).scalar()
+        except ProgrammingError:
+            version = 0
+    if version < SCHEMA_VERSION:
+        logging.warning(f"Database schema is at version {version}, panel expects {SCHEMA_VERSION}. Run `python migrate.py` in discord-bot.")
+    return version
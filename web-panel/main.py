@@ -1,19 +1,23 @@
 from fastapi import FastAPI, Request, Depends, HTTPException, Form
-from fastapi.responses import RedirectResponse, HTMLResponse
+from fastapi.responses import RedirectResponse, HTMLResponse, PlainTextResponse, Response, FileResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, or_
 import oauth
-from database import get_db
+from database import get_db, check_schema_version
 from models import GuildConfig, WordFilter, TicketReason, Ticket
+import gzip
 import os
 import urllib.parse
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Transcript file store written by the bot (its TRANSCRIPT_PATH)
+TRANSCRIPT_PATH = os.getenv("TRANSCRIPT_PATH", "../discord-bot/transcripts")
+
 app = FastAPI()
 # Better session config for local dev (handling localhost/127.0.0.1 better)
 app.add_middleware(
@@ -30,6 +34,10 @@ os.makedirs("static", exist_ok=True)
 templates = Jinja2Templates(directory="templates")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+@app.on_event("startup")
+async def startup():
+    await check_schema_version()
+
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     user = request.session.get("user")
@@ -126,14 +134,17 @@ async def guild_settings(request: Request, guild_id: int, db: AsyncSession = Dep
     reason_result = await db.execute(select(TicketReason).where(TicketReason.guild_id == guild_id))
     ticket_reasons = reason_result.scalars().all()
     
-    # Fetch recent transcripts (closed tickets with transcripts)
+    # Fetch recent transcripts (closed tickets with transcripts), ids only
     transcripts_result = await db.execute(
-        select(Ticket)
-        .where(Ticket.guild_id == guild_id, Ticket.transcript_text.isnot(None))
+        select(Ticket.id)
+        .where(
+            Ticket.guild_id == guild_id,
+            or_(Ticket.transcript_hash.isnot(None), Ticket.transcript_gz.isnot(None), Ticket.transcript_text.isnot(None))
+        )
         .order_by(Ticket.id.desc())
         .limit(20)
     )
-    recent_transcripts = transcripts_result.scalars().all()
+    recent_transcripts = transcripts_result.all()
 
     return templates.TemplateResponse("guild.html", {
         "request": request, 
@@ -278,15 +289,73 @@ async def delete_reason(request: Request, guild_id: int, reason_id: int, db: Asy
     
     return RedirectResponse(f"/guild/{guild_id}?success=true&tab=tickets", status_code=303)
 
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows gzip, honouring q-values (gzip;q=0 refuses it)."""
+    qualities = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    pass
+        qualities[coding] = quality
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
 @app.get("/transcripts/{ticket_id}")
 async def view_transcript(request: Request, ticket_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Ticket).where(Ticket.id == ticket_id))
-    ticket = result.scalar_one_or_none()
+    result = await db.execute(
+        select(Ticket.id, Ticket.transcript_hash, Ticket.transcript_gz, Ticket.transcript_text).where(Ticket.id == ticket_id)
+    )
+    ticket = result.one_or_none()
     
-    if not ticket or not ticket.transcript_text:
+    if not ticket or not (ticket.transcript_hash or ticket.transcript_gz or ticket.transcript_text):
         return PlainTextResponse("Transcript not found or access denied.", status_code=404)
+
+    gzip_ok = accepts_gzip(request.headers.get("accept-encoding", ""))
+
+    if ticket.transcript_hash:
+        digest = ticket.transcript_hash.strip()
+        path = os.path.join(TRANSCRIPT_PATH, digest[:2], digest[2:4], f"{digest}.html.gz")
+        if len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest) or not os.path.isfile(path):
+            return PlainTextResponse("Transcript not found or access denied.", status_code=404)
+
+        # Files are content-addressed, so the hash is a strong validator. The URL is per ticket
+        # and its transcript can be regenerated, so browsers revalidate and get a 304 if unchanged.
+        etag = f'"{digest}"' if gzip_ok else f'"{digest}-identity"'
+        headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "private, no-cache"}
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+
+        if gzip_ok:
+            # Stored gzip goes out as-is; FileResponse streams it from disk and handles Range
+            headers["Content-Encoding"] = "gzip"
+            return FileResponse(path, media_type="text/html; charset=utf-8", headers=headers)
+
+        def decompressed():
+            with gzip.open(path, "rb") as f:
+                while chunk := f.read(64 * 1024):
+                    yield chunk
+        return StreamingResponse(decompressed(), media_type="text/html; charset=utf-8", headers=headers)
+
+    # Transcripts the bot hasn't moved to the file store yet
+    if ticket.transcript_gz:
+        headers = {"Vary": "Accept-Encoding"}
+        if gzip_ok:
+            headers["Content-Encoding"] = "gzip"
+            return Response(content=ticket.transcript_gz, media_type="text/html; charset=utf-8", headers=headers)
+        return Response(content=gzip.decompress(ticket.transcript_gz), media_type="text/html; charset=utf-8", headers=headers)
         
-    # Simple HTML wrapper for the transcript
+    # Older transcripts only have the message HTML, wrap it
     html_content = f"""
     <!DOCTYPE html>
     <html class="dark">
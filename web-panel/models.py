@@ -1,5 +1,7 @@
-from sqlalchemy import BigInteger, String, Boolean, Text, ForeignKey, JSON
+from sqlalchemy import BigInteger, Integer, String, Boolean, Text, ForeignKey, JSON, DateTime, LargeBinary
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Mapped, mapped_column
+import datetime
 from database import Base
 
 class GuildConfig(Base):
@@ -21,6 +23,7 @@ class GuildConfig(Base):
     log_voice_updates: Mapped[bool] = mapped_column(Boolean, default=True)
     
     automod_invite_links: Mapped[bool] = mapped_column(Boolean, default=False)
+    log_retention_days: Mapped[int] = mapped_column(Integer, nullable=True)
     
     mod_role_id: Mapped[int] = mapped_column(BigInteger, nullable=True)
     admin_role_id: Mapped[int] = mapped_column(BigInteger, nullable=True)
@@ -34,9 +37,7 @@ class TicketReason(Base):
     category_id: Mapped[int] = mapped_column(BigInteger)
     description: Mapped[str] = mapped_column(Text, nullable=True)
     emoji: Mapped[str] = mapped_column(String(50), nullable=True)
-    # required_roles is BIGINT[] in postgres, SQLAlchemy needs an adaptation
-    # For now we'll skip complex types or use pickletype/json if needed
-    # required_roles: Mapped[list] = mapped_column(JSON, nullable=True) 
+    required_roles: Mapped[list] = mapped_column(ARRAY(BigInteger), nullable=True)
 
 class WordFilter(Base):
     __tablename__ = "word_filters"
@@ -44,6 +45,7 @@ class WordFilter(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     guild_id: Mapped[int] = mapped_column(BigInteger)
     phrase: Mapped[str] = mapped_column(Text)
+
 class Ticket(Base):
     __tablename__ = "tickets"
     
@@ -51,6 +53,15 @@ class Ticket(Base):
     guild_id: Mapped[int] = mapped_column(BigInteger)
     channel_id: Mapped[int] = mapped_column(BigInteger, unique=True)
     owner_id: Mapped[int] = mapped_column(BigInteger)
-    status: Mapped[str] = mapped_column(String(20))
-    transcript_text: Mapped[str] = mapped_column(Text, nullable=True)
-    created_at: Mapped[str] = mapped_column(Text) # Using Text for simplicity or DateTime
+    reason_id: Mapped[int] = mapped_column(ForeignKey("ticket_reasons.id"), nullable=True)
+    status: Mapped[str] = mapped_column(String(20), default="open")
+    claimed_by: Mapped[int] = mapped_column(BigInteger, nullable=True)
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=True)
+    closed_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=True)
+    deleted_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=True)
+    transcript_url: Mapped[str] = mapped_column(Text, nullable=True)
+    # Older transcripts, until the bot moves them to the transcript file store
+    transcript_text: Mapped[str] = mapped_column(Text, nullable=True, deferred=True)
+    transcript_gz: Mapped[bytes] = mapped_column(LargeBinary, nullable=True, deferred=True)
+    # SHA-256 of the transcript HTML, stored as TRANSCRIPT_PATH/ab/cd/<hash>.html.gz
+    transcript_hash: Mapped[str] = mapped_column(String(64), nullable=True)